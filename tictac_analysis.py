@@ -0,0 +1,192 @@
+""" Every move of many recorded 3x3 games scored against perfect play, as whole arrays.
+
+position_values() holds the solved result of every position (from tictac_solver), indexed by the
+base-3 position index.  Games are (N, 9) arrays of cells (3*row + col, -1 after the last move), as
+GameLog.moves() returns; the position index before and after each move is a running sum, so one
+lookup per array scores every move of every game.  A blunder is a move after which the mover's
+perfect-play result is worse than before it: a win thrown to a draw or a loss, or a draw to a
+loss.
+
+    stats = BlunderStats(levels={0: 0, 1: 3})
+    stats.add_log(GameLog("games.log"))
+    print(stats.rate_by_level(), stats.rate_by_ply())
+"""
+import numpy as np
+
+import tictac_bitboard as ttb
+import tictac_solver as ttsolve
+from tictac_policy import position_index
+
+_VALUES = None
+_POWERS = 3 ** np.arange(9, dtype=np.int32)
+
+
+def _fill_values(xbits, obits, values):
+    idx = position_index(xbits, obits)
+    if values[idx] != 2:
+        return
+    x_to_move = bin(xbits).count("1") == bin(obits).count("1")
+    if ttb.WIN_TABLE[xbits]:
+        values[idx] = 1
+        return
+    if ttb.WIN_TABLE[obits]:
+        values[idx] = -1
+        return
+    if ttb.is_full(xbits, obits):
+        values[idx] = 0
+        return
+    score, _ = ttsolve.lookup(xbits, obits)
+    values[idx] = np.sign(score) * (1 if x_to_move else -1)
+    for bit in ttb.CELL_BITS_FLAT:
+        if not (xbits | obits) & bit:
+            if x_to_move:
+                _fill_values(xbits | bit, obits, values)
+            else:
+                _fill_values(xbits, obits | bit, values)
+
+
+def position_values():
+    """ int8 per base-3 position index: the perfect-play result for X (1 win, -1 loss, 0 draw).
+    Finished positions hold their actual result; unreachable ones hold 2.
+    """
+    global _VALUES
+    if _VALUES is None:
+        values = np.full(3**9, 2, dtype=np.int8)
+        _fill_values(0, 0, values)
+        _VALUES = values
+    return _VALUES
+
+
+def history_array(histories):
+    """ (N, 9) int8 cells from TttGame.history lists of (row, col), -1 after each game's last move. """
+    moves = np.full((len(histories), 9), -1, dtype=np.int8)
+    for idx, history in enumerate(histories):
+        moves[idx, :len(history)] = [3*row + col for row, col in history]
+    return moves
+
+
+def score_moves(moves):
+    """ Perfect-play result for the mover before and after each move, as two (N, 9) int8 arrays
+    (1 win, 0 draw, -1 loss; 0 where there was no move).
+    """
+    moves = np.asarray(moves)
+    played = moves >= 0
+    # X's digits count 1, O's count 2; X moves on even plies
+    digit = np.where(played, _POWERS[np.where(played, moves, 0)] * np.array([1, 2] * 4 + [1], dtype=np.int32), 0)
+    after = np.cumsum(digit, axis=1)
+    before = after - digit
+
+    values = position_values()
+    side = np.array([1, -1] * 4 + [1], dtype=np.int8)
+    value_before = np.where(played, values[before] * side, 0).astype(np.int8)
+    value_after = np.where(played, values[after] * side, 0).astype(np.int8)
+    return value_before, value_after
+
+
+def find_blunders(moves):
+    """ (N, 9) bool: True where a move made its mover's perfect-play result worse. """
+    value_before, value_after = score_moves(moves)
+    return value_after < value_before
+
+
+def _add_counts(total, counts):
+    """ total + counts for bincount arrays of possibly different lengths. """
+    if len(counts) > len(total):
+        total = np.concatenate([total, np.zeros(len(counts) - len(total), dtype=total.dtype)])
+    total[:len(counts)] += counts
+    return total
+
+
+class BlunderStats():
+    """ Moves and blunders counted by player id, INTELLIGENCE level, ply (0-8) and cell (0-8).
+
+    levels maps player ids to INTELLIGENCE (a sequence indexed by id, or a dict); players it
+    doesn't cover are left out of the by-level counts, which stay empty without it.  Kinds counts
+    blunders by (result before, result after): win -> draw, win -> loss, draw -> loss.
+    """
+    KINDS = ("win_to_draw", "win_to_loss", "draw_to_loss")
+
+    def __init__(self, levels=None):
+        if isinstance(levels, dict):
+            lookup = np.full(max(levels) + 1, -1, dtype=np.int64)
+            for player, level in levels.items():
+                lookup[player] = level
+            levels = lookup
+        self.levels = None if levels is None else np.asarray(levels, dtype=np.int64)
+        self.n_games = 0
+        self.moves_by_player = np.zeros(0, dtype=np.int64)
+        self.blunders_by_player = np.zeros(0, dtype=np.int64)
+        self.moves_by_level = np.zeros(0, dtype=np.int64)
+        self.blunders_by_level = np.zeros(0, dtype=np.int64)
+        self.moves_by_ply = np.zeros(9, dtype=np.int64)
+        self.blunders_by_ply = np.zeros(9, dtype=np.int64)
+        self.moves_by_cell = np.zeros(9, dtype=np.int64)
+        self.blunders_by_cell = np.zeros(9, dtype=np.int64)
+        self.kinds = np.zeros(3, dtype=np.int64)
+
+    def add(self, moves, player_x=None, player_o=None):
+        """ Folds in an (N, 9) block of games; player_x / player_o are per-game ids (default 0 and 1). """
+        moves = np.asarray(moves)
+        n_games = len(moves)
+        if player_x is None:
+            player_x = np.zeros(n_games, dtype=np.int64)
+        if player_o is None:
+            player_o = np.ones(n_games, dtype=np.int64)
+        value_before, value_after = score_moves(moves)
+        played = moves >= 0
+        blunder = value_after < value_before
+        self.n_games += n_games
+
+        # the mover of each ply: X on even plies, O on odd
+        mover = np.where(np.arange(9) % 2 == 0, np.asarray(player_x, dtype=np.int64)[:, None], np.asarray(player_o, dtype=np.int64)[:, None])
+        self.moves_by_player = _add_counts(self.moves_by_player, np.bincount(mover[played]))
+        self.blunders_by_player = _add_counts(self.blunders_by_player, np.bincount(mover[blunder]))
+        if self.levels is not None:
+            # players the levels don't cover count as -1, like the unmapped ids of a dict
+            level = np.where(mover < len(self.levels), self.levels[np.minimum(mover, len(self.levels) - 1)], -1)
+            self.moves_by_level = _add_counts(self.moves_by_level, np.bincount(level[played & (level >= 0)]))
+            self.blunders_by_level = _add_counts(self.blunders_by_level, np.bincount(level[blunder & (level >= 0)]))
+
+        self.moves_by_ply += played.sum(axis=0)
+        self.blunders_by_ply += blunder.sum(axis=0)
+        self.moves_by_cell += np.bincount(moves[played], minlength=9)
+        self.blunders_by_cell += np.bincount(moves[blunder], minlength=9)
+
+        # before - after is 1 for win -> draw and draw -> loss, 2 for win -> loss
+        self.kinds[0] += (blunder & (value_before == 1) & (value_after == 0)).sum()
+        self.kinds[1] += (blunder & (value_after == value_before - 2)).sum()
+        self.kinds[2] += (blunder & (value_before == 0)).sum()
+        return blunder
+
+    def add_log(self, log, block=1 << 20):
+        """ Folds in a whole tictac_gamelog.GameLog, a block of games at a time. """
+        for start in range(0, len(log), block):
+            stop = start + block
+            self.add(log.moves(start, stop), log.player_x[start:stop], log.player_o[start:stop])
+
+    def merge(self, other):
+        for name in ("moves_by_player", "blunders_by_player", "moves_by_level", "blunders_by_level"):
+            setattr(self, name, _add_counts(getattr(self, name), getattr(other, name)))
+        for name in ("moves_by_ply", "blunders_by_ply", "moves_by_cell", "blunders_by_cell", "kinds"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.n_games += other.n_games
+        return self
+
+    @staticmethod
+    def _rate(blunders, moves):
+        blunders = _add_counts(np.zeros(len(moves), dtype=np.int64), blunders)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return blunders / moves
+
+    def rate_by_player(self):
+        return self._rate(self.blunders_by_player, self.moves_by_player)
+
+    def rate_by_level(self):
+        return self._rate(self.blunders_by_level, self.moves_by_level)
+
+    def rate_by_ply(self):
+        return self._rate(self.blunders_by_ply, self.moves_by_ply)
+
+    def rate_by_cell(self):
+        """ As a (3, 3) board. """
+        return self._rate(self.blunders_by_cell, self.moves_by_cell).reshape(3, 3)
@@ -0,0 +1,135 @@
+""" Plays many heuristic-bot games at once, one (N, 9) array of boards, one ply at a time.
+
+Cells are flattened row-major (cell = 3*row + col) and hold 1 (X), -1 (O) or 0 (empty).
+The move policy is TttHeuristic's, written as array operations over the whole batch:
+    INTELLIGENCE >= 1: win if possible
+    INTELLIGENCE >= 2: else block if possible
+    INTELLIGENCE >= 3: else fork if possible
+    otherwise a uniformly random legal move
+Ties are broken the way TttHeuristic breaks them: the last winning line in its scan order
+(diagonals, rows, cols) and the forking cell furthest along the board.
+"""
+import numpy as np
+
+# same order as tictac_game.board_lines, which TttGame.completing_moves scans in
+LINES = np.array([
+    [0, 4, 8], [2, 4, 6],               # main / counter diagonal
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],    # rows
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],    # cols
+    ])
+
+# INCIDENCE[cell, line] is 1 when the cell lies on the line
+INCIDENCE = np.zeros((9, len(LINES)), dtype=np.int8)
+for _line, _cells in enumerate(LINES):
+    INCIDENCE[_cells, _line] = 1
+
+DEFAULT_BATCH = 2**18
+
+
+def _last_true(mask):
+    """ Index of the last True in each row, and whether there was one at all. """
+    n_cols = mask.shape[1]
+    return n_cols - 1 - np.argmax(mask[:, ::-1], axis=1), mask.any(axis=1)
+
+
+def _line_counts(boards, marker):
+    cells = boards[:, LINES]    # (N, 8, 3)
+    own = (cells == marker).sum(axis=2)
+    empty = (cells == 0).sum(axis=2)
+    return own, empty
+
+
+def _completing_cells(boards, marker):
+    """ For each board, the cell that completes a line for `marker` (if any). """
+    own, empty = _line_counts(boards, marker)
+    wins = (own == 2) & (empty == 1)
+    line, found = _last_true(wins)
+    cells = LINES[line]
+    rows = np.arange(len(boards))
+    gap = np.argmax(boards[rows[:, None], cells] == 0, axis=1)
+    return cells[rows, gap], found
+
+
+def _fork_cells(boards, marker):
+    """ For each board, the last empty cell that leaves `marker` with 2+ winning plays. """
+    own, empty = _line_counts(boards, marker)
+    wins = ((own == 2) & (empty == 1)).astype(np.int8)
+    halves = ((own == 1) & (empty == 2)).astype(np.int8)
+    # playing a cell completes the half-lines through it, and fills the winning lines through it
+    n_wins = wins.sum(axis=1)[:, None] + halves @ INCIDENCE.T - wins @ INCIDENCE.T
+    forks = (boards == 0) & (n_wins > 1)
+    return _last_true(forks)
+
+
+def _random_cells(boards, rng):
+    keys = rng.random(boards.shape)
+    keys[boards != 0] = -1.
+    return np.argmax(keys, axis=1)
+
+
+def choose_moves(boards, marker, levels, rng):
+    """ Returns one cell per board, following TttHeuristic's policy at each board's INTELLIGENCE level. """
+    moves = _random_cells(boards, rng)
+    if (levels >= 3).any():
+        fork, found = _fork_cells(boards, marker)
+        use = found & (levels >= 3)
+        moves[use] = fork[use]
+    if (levels >= 2).any():
+        block, found = _completing_cells(boards, -marker)
+        use = found & (levels >= 2)
+        moves[use] = block[use]
+    if (levels >= 1).any():
+        win, found = _completing_cells(boards, marker)
+        use = found & (levels >= 1)
+        moves[use] = win[use]
+    return moves
+
+
+def play_batch(int_x, int_o, rng=None):
+    """ Plays len(int_x) games, X at intelligence int_x[i] against O at int_o[i].
+
+    Returns the final (N, 9) boards and an outcome per game: 1 (X won), -1 (O won), 0 (draw).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    int_x = np.asarray(int_x)
+    int_o = np.asarray(int_o)
+    n_games = len(int_x)
+    boards = np.zeros((n_games, 9), dtype=np.int8)
+    outcome = np.zeros(n_games, dtype=np.int8)
+    live = np.arange(n_games)
+    marker = 1
+    for ply in range(9):
+        if len(live) == 0:
+            break
+        levels = int_x[live] if marker == 1 else int_o[live]
+        moves = choose_moves(boards[live], marker, levels, rng)
+        boards[live, moves] = marker
+        won = (boards[live][:, LINES] == marker).all(axis=2).any(axis=1)
+        outcome[live[won]] = marker
+        live = live[~won]
+        marker = -marker
+    return boards, outcome
+
+
+def sweep(n_games=1000, intelligence=range(4), seed=None, batch_size=DEFAULT_BATCH):
+    """ Same round-robin as the ttt.py sweep: n_games per (INTELLIGENCE_x, INTELLIGENCE_o) pairing.
+
+    Returns the xwins, owins, draws matrices, indexed [int_x, int_o].
+    """
+    rng = np.random.default_rng(seed)
+    intelligence = np.asarray(list(intelligence))
+    n_int = len(intelligence)
+    n_pairs = n_int * n_int
+    counts = np.zeros((3, n_pairs), dtype=np.int64)    # xwins, owins, draws
+
+    total = n_pairs * n_games
+    for start in range(0, total, batch_size):
+        pair = np.arange(start, min(start + batch_size, total)) // n_games
+        _, outcome = play_batch(intelligence[pair // n_int], intelligence[pair % n_int], rng)
+        counts[0] += np.bincount(pair[outcome == 1], minlength=n_pairs)
+        counts[1] += np.bincount(pair[outcome == -1], minlength=n_pairs)
+        counts[2] += np.bincount(pair[outcome == 0], minlength=n_pairs)
+
+    xwins, owins, draws = counts.reshape((3, n_int, n_int)).astype(float)
+    return xwins, owins, draws
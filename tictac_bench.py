@@ -0,0 +1,155 @@
+""" Performance benchmarks for the engine and players.
+
+Each benchmark reports one number, in seconds per operation (lower is better) or operations per
+second (higher is better).  Results are written as JSON; given a baseline file from an earlier
+run, any metric that got worse by more than the tolerance is reported and the exit code is 1.
+
+    python tictac_bench.py --output bench.json
+    python tictac_bench.py --baseline bench.json --tolerance 0.5
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+
+import numpy as np
+
+import tictac_batch as ttbatch
+import tictac_game as ttg
+import tictac_tournament as ttt
+from tictac_players import DecisionCache, TttHeuristic
+
+
+def _best_per_call(func, repeat=5):
+    """ Best-of-`repeat` seconds per call, each repeat running long enough (~0.2s) to be measurable. """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _bots(level=0):
+    bot_x = TttHeuristic("bench_x", rng=random.Random(0), verbose=False)
+    bot_o = TttHeuristic("bench_o", rng=random.Random(1), verbose=False)
+    bot_x.INTELLIGENCE = bot_o.INTELLIGENCE = level
+    return bot_x, bot_o
+
+
+def _midgame(game_class, moves=((1, 1), (0, 0), (2, 2), (0, 2))):
+    bot_x, bot_o = _bots()
+    game = game_class(bot_x, bot_o, headless=True)
+    for move in moves:
+        game.push(move)
+    return game
+
+
+def bench_game_throughput(game_class, n_games=200):
+    bot_x, bot_o = _bots()
+    def run():
+        for idx in range(n_games):
+            game_class(bot_x, bot_o, headless=True).play()
+    return n_games / _best_per_call(run, repeat=3)
+
+
+def bench_check_winner(game_class):
+    game = _midgame(game_class)
+    return _best_per_call(game.check_winner)
+
+
+def bench_give_input(level, cached=False):
+    bot_x, bot_o = _bots(level)
+    if cached:
+        bot_x.decision_cache = DecisionCache()
+    game = _midgame(ttg.TttBitGame)
+    return _best_per_call(lambda: bot_x.give_input(game))
+
+
+def bench_fork_search():
+    game = _midgame(ttg.TttBitGame, moves=((1, 1), (0, 1)))
+    return _best_per_call(lambda: game.fork_moves(game.current_marker))
+
+
+def bench_tournament(n_games=50):
+    started = time.perf_counter()
+    ttt.run_tournament(n_games=n_games, seed=0, workers=1)
+    return time.perf_counter() - started
+
+
+def bench_batch_sweep(n_games=20000):
+    started = time.perf_counter()
+    ttbatch.sweep(n_games=n_games, seed=0)
+    return 16 * n_games / (time.perf_counter() - started)
+
+
+def run_benchmarks(quick=False):
+    """ Returns {name: {"value": number, "unit": str, "higher_is_better": bool}}. """
+    scale = 0.2 if quick else 1.0
+    results = {}
+
+    def record(name, value, unit, higher_is_better=False):
+        results[name] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+    record("game_throughput.TttGame", bench_game_throughput(ttg.TttGame, int(200 * scale)), "games/s", True)
+    record("game_throughput.TttBitGame", bench_game_throughput(ttg.TttBitGame, int(200 * scale)), "games/s", True)
+    record("check_winner.TttGame", bench_check_winner(ttg.TttGame), "s/call")
+    record("check_winner.TttBitGame", bench_check_winner(ttg.TttBitGame), "s/call")
+    for level in range(4):
+        record("give_input.intelligence_{0}".format(level), bench_give_input(level), "s/call")
+    record("give_input.intelligence_3.cached", bench_give_input(3, cached=True), "s/call")
+    record("fork_search", bench_fork_search(), "s/call")
+    record("tournament.round_robin", bench_tournament(int(50 * scale)), "s")
+    record("batch.sweep", bench_batch_sweep(int(20000 * scale)), "games/s", True)
+    return results
+
+
+def compare(results, baseline, tolerance=0.5):
+    """ Lists the metrics that are more than `tolerance` (fractionally) worse than the baseline. """
+    regressions = []
+    for name, current in sorted(results.items()):
+        if name not in baseline:
+            continue
+        before = baseline[name]["value"]
+        now = current["value"]
+        # slowdown > 1 means worse, whichever direction the metric runs
+        slowdown = before / now if current["higher_is_better"] else now / before
+        if slowdown > 1 + tolerance:
+            regressions.append("{0}: {1:.4g} -> {2:.4g} {3} ({4:.0%} worse)".format(name, before, now, current["unit"], slowdown - 1))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tic-tac-toe engine benchmarks")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed fractional slowdown per metric")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads, noisier numbers")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": run_benchmarks(quick=args.quick),
+        }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(report["results"], baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+""" Compact 3x3 board representation: one 9-bit integer per player.
+
+Cell (row, col) is bit 3*row + col.  Win and draw tests are single table lookups.
+"""
+import numpy as np
+
+FULL_MASK = 0b111111111
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,   # rows
+    0b001001001, 0b010010010, 0b100100100,   # cols
+    0b100010001, 0b001010100,                # main / counter diagonal
+    )
+
+# WIN_TABLE[bits] is True when the 9-bit position holds any complete line
+WIN_TABLE = tuple(any((bits & mask) == mask for mask in WIN_MASKS) for bits in range(FULL_MASK + 1))
+
+CELL_BITS = tuple(tuple(1 << (3*row + col) for col in range(3)) for row in range(3))
+CELL_BITS_FLAT = tuple(1 << idx for idx in range(9))
+BIT_CELLS = tuple((idx // 3, idx % 3) for idx in range(9))
+
+
+def is_full(xbits, obits):
+    return (xbits | obits) == FULL_MASK
+
+
+def bits_to_board(xbits, obits):
+    """ Builds the NaN/1/-1 float board used by TttGame from the two bitmasks. """
+    flat = np.full(9, np.nan)
+    for idx in range(9):
+        if (xbits >> idx) & 1:
+            flat[idx] = 1
+        elif (obits >> idx) & 1:
+            flat[idx] = -1
+    return flat.reshape((3,3))
+
+
+def board_to_bits(board):
+    """ Inverse of bits_to_board. """
+    flat = np.asarray(board).reshape(9)
+    xbits = 0
+    obits = 0
+    for idx in range(9):
+        if flat[idx] == 1:
+            xbits |= 1 << idx
+        elif flat[idx] == -1:
+            obits |= 1 << idx
+    return xbits, obits
+
+
+# the 8 rotations/reflections of the board, as (row, col) -> (row, col) maps
+_SYMMETRY_MAPS = (
+    lambda r, c: (r, c),            # identity
+    lambda r, c: (c, 2 - r),        # rotate 90
+    lambda r, c: (2 - r, 2 - c),    # rotate 180
+    lambda r, c: (2 - c, r),        # rotate 270
+    lambda r, c: (r, 2 - c),        # mirror left/right
+    lambda r, c: (2 - r, c),        # mirror top/bottom
+    lambda r, c: (c, r),            # transpose
+    lambda r, c: (2 - c, 2 - r),    # anti-transpose
+    )
+
+# SYMMETRIES[s][cell] is where `cell` lands under symmetry s
+SYMMETRIES = tuple(
+    tuple(3*fn(idx // 3, idx % 3)[0] + fn(idx // 3, idx % 3)[1] for idx in range(9))
+    for fn in _SYMMETRY_MAPS)
+
+# INVERSE_SYMMETRY[s] undoes symmetry s
+INVERSE_SYMMETRY = tuple(
+    next(t for t in range(8) if all(SYMMETRIES[t][SYMMETRIES[s][idx]] == idx for idx in range(9)))
+    for s in range(8))
+
+
+def _permute_bits(bits, perm):
+    out = 0
+    for idx in range(9):
+        if (bits >> idx) & 1:
+            out |= 1 << perm[idx]
+    return out
+
+
+# SYMMETRY_BITS[s][bits] is the 9-bit mask `bits` transformed by symmetry s
+SYMMETRY_BITS = tuple(tuple(_permute_bits(bits, perm) for bits in range(FULL_MASK + 1)) for perm in SYMMETRIES)
+
+
+def state_key(xbits, obits):
+    return xbits | (obits << 9)
+
+
+def canonical(xbits, obits):
+    """ Folds a position over the 8 symmetries.
+
+    Returns (key, sym): the smallest state_key among the symmetric images, and the symmetry
+    that maps the given position onto it.
+    """
+    best_key = None
+    best_sym = 0
+    for sym in range(8):
+        table = SYMMETRY_BITS[sym]
+        key = table[xbits] | (table[obits] << 9)
+        if best_key is None or key < best_key:
+            best_key = key
+            best_sym = sym
+    return best_key, best_sym
+
+
+def game_bits(game):
+    """ The (xbits, obits) of any TttGame; free for TttBitGame, one board scan otherwise. """
+    if hasattr(game, "xbits"):
+        return game.xbits, game.obits
+    return board_to_bits(game.board)
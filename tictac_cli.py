@@ -0,0 +1,234 @@
+""" Command-line entry point.
+
+    python tictac_cli.py play [--bot heuristic:3] [--second] [--rows 3 --cols 3 -k 3]
+    python tictac_cli.py bots --x heuristic:3 --o perfect --games 1000 --seed 0
+    python tictac_cli.py tournament --games 1000 --levels 0 1 2 3 --workers 4 [--engine object] [--ci-width 0.1]
+    python tictac_cli.py bench [--quick] [--baseline bench.json]
+
+Players are given as kind[:value]: heuristic:<INTELLIGENCE>, perfect, search[:<max depth>],
+mcts:<playouts>, qlearn[:<table path>] (see tictac_league.make_player).  A search given a depth
+searches it in full; without one it has a second per move.  perfect and qlearn play 3x3 only.
+
+Only argparse is imported up front; each subcommand imports what it needs when it runs, so
+`play` loads the game and the one bot and nothing else.  Heuristic-only batch work on 3x3 goes to
+the tictac_batch array engine unless --engine object is asked for.
+"""
+import argparse
+import sys
+
+# what the value after "kind:" sets, per kind
+SPEC_VALUES = {"heuristic": ("intelligence", int), "search": ("max_depth", int), "mcts": ("playouts", int), "qlearn": ("path", str)}
+
+
+def parse_spec(text):
+    """ "heuristic:3" -> {"kind": "heuristic", "intelligence": 3}. """
+    kind, _, value = text.partition(":")
+    spec = {"kind": kind}
+    if value:
+        if kind not in SPEC_VALUES:
+            raise argparse.ArgumentTypeError("{0} players take no value".format(kind))
+        name, convert = SPEC_VALUES[kind]
+        try:
+            spec[name] = convert(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError("bad value for {0}: {1!r}".format(kind, value))
+        if kind == "search":
+            spec["time_limit"] = None
+    elif kind == "heuristic":
+        spec["intelligence"] = 3
+    elif kind not in ("perfect", "search", "mcts", "qlearn"):
+        raise argparse.ArgumentTypeError("unknown player kind {0!r}".format(kind))
+    return spec
+
+
+def _make_player(spec, name, seed=None):
+    if spec["kind"] == "heuristic":
+        # the common case, kept off tictac_league's imports
+        import random
+        from tictac_players import TttHeuristic
+        player = TttHeuristic(name, rng=random.Random(seed), verbose=False)
+        player.INTELLIGENCE = spec["intelligence"]
+        return player
+    from tictac_league import make_player
+    return make_player(spec, name, seed)
+
+
+def _check_players(parser, args, *specs):
+    """ Rejects players that can't play the board asked for, before any game starts. """
+    for spec in specs:
+        if spec["kind"] == "heuristic":
+            continue
+        from tictac_league import SMALL_BOARD_KINDS
+        if spec["kind"] in SMALL_BOARD_KINDS and (args.rows, args.cols, args.k) != (3, 3, 3):
+            parser.error("{0} players only play on 3x3".format(spec["kind"]))
+        if spec["kind"] == "qlearn":
+            import os
+            import tictac_learn as ttlearn
+            path = spec.get("path", ttlearn.DEFAULT_PATH)
+            if not os.path.exists(path):
+                parser.error("no Q table at {0}; train one with python tictac_learn.py".format(path))
+
+
+def _game_class(args):
+    import tictac_game as ttg
+    if (args.rows, args.cols, args.k) == (3, 3, 3):
+        return ttg.TttBitGame
+    return ttg.TttGame
+
+
+def cmd_play(args):
+    from tictac_players import TttHuman
+    human = TttHuman(args.name, verbose=False)
+    bot = _make_player(args.bot, "bot", args.seed)
+    players = (bot, human) if args.second else (human, bot)
+    game = _game_class(args)(*players, n_rows=args.rows, n_cols=args.cols, k=args.k)
+    try:
+        winner = game.play()
+    except (KeyboardInterrupt, EOFError):
+        print()
+        return 1
+    human._print_board(game)
+    if winner is None:
+        print("Draw.")
+    else:
+        print("You win." if winner is human else "The bot wins.")
+    return 0
+
+
+def _batch_ok(args, *specs):
+    if args.engine == "object":
+        return False
+    ok = (args.rows, args.cols, args.k) == (3, 3, 3) and all(spec["kind"] == "heuristic" for spec in specs)
+    if args.engine == "batch" and not ok:
+        raise SystemExit("--engine batch plays heuristic bots on 3x3 only")
+    return ok
+
+
+def cmd_bots(args):
+    if _batch_ok(args, args.x, args.o):
+        import numpy as np
+        import tictac_batch as ttbatch
+        import tictac_fingerprint as ttfp
+        rng = np.random.default_rng(args.seed)
+        boards, outcome = ttbatch.play_batch(np.full(args.games, args.x["intelligence"]), np.full(args.games, args.o["intelligence"]), rng)
+        counts = {"x": int((outcome == 1).sum()), "o": int((outcome == -1).sum()), "draw": int((outcome == 0).sum())}
+        print("outcomes:", counts)
+        print("unique final boards:", len(set(ttfp.batch_board_keys(boards).tolist())))
+        return 0
+
+    import random
+    from tictac_stats import GameStats
+    seeds = random.Random(args.seed)
+    bot_x = _make_player(args.x, "x", seeds.getrandbits(64))
+    bot_o = _make_player(args.o, "o", seeds.getrandbits(64))
+    game_class = _game_class(args)
+    stats = GameStats(args.rows, args.cols)
+    finals = None
+    if (args.rows, args.cols, args.k) == (3, 3, 3):
+        import tictac_fingerprint as ttfp
+        finals = ttfp.GameIndex()
+    for idx in range(args.games):
+        game = game_class(bot_x, bot_o, headless=True, n_rows=args.rows, n_cols=args.cols, k=args.k)
+        game.play()
+        stats.add_game(game)
+        if finals is not None:
+            finals.add(game)
+    summary = stats.to_dict()
+    print("outcomes:", summary["outcomes"])
+    print("game lengths:", summary["game_lengths"])
+    if finals is not None:
+        print("unique final boards:", finals.n_unique)
+    return 0
+
+
+def _print_matrix(title, matrix, levels, fmt):
+    print(title)
+    print("  X\\O " + " ".join("{0:>7}".format(level) for level in levels))
+    for level, row in zip(levels, matrix):
+        print("{0:>5} ".format(level) + " ".join(fmt.format(value) for value in row))
+
+
+def cmd_tournament(args):
+    import tictac_tournament as ttt
+    engine = "batch" if _batch_ok(args) else "object"
+    workers = args.workers
+    if engine == "batch" and workers is None:
+        workers = 1     # the array engine is fast enough that a pool only adds start-up time
+    if args.ci_width is not None:
+        xwins, owins, draws, games = ttt.run_adaptive(args.ci_width, max_games=args.max_games, intelligence=args.levels, seed=args.seed,
+                                                      workers=workers, chunk_size=args.chunk_size, engine=engine)
+    else:
+        xwins, owins, draws = ttt.run_tournament(args.games, args.levels, args.seed, workers, args.chunk_size, engine)
+        games = xwins + owins + draws
+    print("engine: {0}, games played: {1}".format(engine, int(games.sum())))
+    for title, matrix in (("X wins", xwins), ("O wins", owins), ("draws", draws)):
+        _print_matrix(title, matrix / games, args.levels, "{0:>7.3f}")
+    if args.ci_width is not None:
+        _print_matrix("games", games, args.levels, "{0:>7d}")
+    return 0
+
+
+def cmd_bench(args):
+    import tictac_bench
+    return tictac_bench.main(args.bench_args)
+
+
+def _add_board(parser):
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("-k", type=int, default=3, help="in a row to win")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="tictac", description="Tic-tac-toe games, bots and tournaments")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    play = commands.add_parser("play", help="play against a bot")
+    play.add_argument("--bot", type=parse_spec, default=parse_spec("heuristic:3"))
+    play.add_argument("--second", action="store_true", help="let the bot move first")
+    play.add_argument("--name", default="you")
+    play.add_argument("--seed", type=int, default=None)
+    _add_board(play)
+    play.set_defaults(func=cmd_play)
+
+    bots = commands.add_parser("bots", help="bot against bot")
+    bots.add_argument("--x", type=parse_spec, default=parse_spec("heuristic:3"))
+    bots.add_argument("--o", type=parse_spec, default=parse_spec("heuristic:3"))
+    bots.add_argument("--games", type=int, default=1000)
+    bots.add_argument("--seed", type=int, default=0)
+    bots.add_argument("--engine", choices=("auto", "batch", "object"), default="auto")
+    _add_board(bots)
+    bots.set_defaults(func=cmd_bots)
+
+    tournament = commands.add_parser("tournament", help="every INTELLIGENCE level against every other")
+    tournament.add_argument("--games", type=int, default=1000, help="per pairing")
+    tournament.add_argument("--levels", type=int, nargs="+", default=[0, 1, 2, 3])
+    tournament.add_argument("--seed", type=int, default=0)
+    tournament.add_argument("--workers", type=int, default=None, help="processes (default: every core; 1 runs in-process)")
+    tournament.add_argument("--chunk-size", type=int, default=250)
+    tournament.add_argument("--engine", choices=("auto", "batch", "object"), default="auto")
+    tournament.add_argument("--ci-width", type=float, default=None, help="stop each pairing once its rates are this tight")
+    tournament.add_argument("--max-games", type=int, default=10000, help="per pairing, with --ci-width")
+    tournament.set_defaults(func=cmd_tournament, rows=3, cols=3, k=3)
+
+    bench = commands.add_parser("bench", help="run tictac_bench; other arguments (--quick, --baseline ...) go to it")
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "bench":
+        args.bench_args = extra
+    elif extra:
+        parser.error("unrecognized arguments: {0}".format(" ".join(extra)))
+    if args.command == "play":
+        _check_players(parser, args, args.bot)
+    elif args.command == "bots":
+        _check_players(parser, args, args.x, args.o)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
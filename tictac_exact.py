@@ -0,0 +1,110 @@
+""" Exact outcome probabilities, propagated through the game's state graph instead of sampled.
+
+For players whose move choice is a known distribution over the position (move_distribution),
+P(outcome | position) = sum over moves of P(move) * P(outcome | position after move), with each
+position solved once and memoized.  The result is what an infinite number of sampled games
+would converge to.
+
+outcome_probabilities() works on any m,n,k game through push/pop.  outcome_tensor() is the
+ttt.py sweep: it reads every level's candidate moves from the TttHeuristic policy table, so
+each pairing takes around ten milliseconds.
+"""
+from fractions import Fraction
+
+import numpy as np
+
+import tictac_bitboard as ttb
+import tictac_game as ttg
+from tictac_players import position_key
+
+
+def _solve(game, memo, exact):
+    key = position_key(game)
+    if key in memo:
+        return memo[key]
+    p_x = p_o = p_draw = 0
+    for move, prob in game.current_player.move_distribution(game):
+        if exact:
+            prob = Fraction(prob).limit_denominator(10**6)
+        game.push(move)
+        if not game.is_finished:
+            sub_x, sub_o, sub_draw = _solve(game, memo, exact)
+            p_x += prob * sub_x
+            p_o += prob * sub_o
+            p_draw += prob * sub_draw
+        elif game.winning_player is None:
+            p_draw += prob
+        elif game.current_marker == 1:
+            p_x += prob
+        else:
+            p_o += prob
+        game.pop()
+    memo[key] = (p_x, p_o, p_draw)
+    return memo[key]
+
+
+def outcome_probabilities(player_x, player_o, n_rows=3, n_cols=3, k=3, exact=False):
+    """ (P(X wins), P(O wins), P(draw)) for player_x moving first against player_o.
+
+    Both players must implement move_distribution.  exact=True does the arithmetic in Fractions.
+    """
+    game_class = ttg.TttBitGame if (n_rows, n_cols, k) == (3, 3, 3) else ttg.TttGame
+    game = game_class(player_x, player_o, headless=True, n_rows=n_rows, n_cols=n_cols, k=k)
+    return _solve(game, {}, exact)
+
+
+def _solve_masks(xbits, obits, x_masks, o_masks, position_index, memo):
+    """ Same recursion over bitboards, with each side's candidate moves read from a mask column. """
+    key = xbits | (obits << 9)
+    if key in memo:
+        return memo[key]
+    x_to_move = bin(xbits).count("1") == bin(obits).count("1")
+    mask = int((x_masks if x_to_move else o_masks)[position_index(xbits, obits)])
+    moves = [bit for bit in ttb.CELL_BITS_FLAT if mask & bit]
+    prob = 1. / len(moves)
+    p_x = p_o = p_draw = 0.
+    for bit in moves:
+        if x_to_move:
+            child_x, child_o = xbits | bit, obits
+        else:
+            child_x, child_o = xbits, obits | bit
+        if ttb.WIN_TABLE[child_x if x_to_move else child_o]:
+            if x_to_move:
+                p_x += prob
+            else:
+                p_o += prob
+        elif ttb.is_full(child_x, child_o):
+            p_draw += prob
+        else:
+            sub_x, sub_o, sub_draw = _solve_masks(child_x, child_o, x_masks, o_masks, position_index, memo)
+            p_x += prob * sub_x
+            p_o += prob * sub_o
+            p_draw += prob * sub_draw
+    memo[key] = (p_x, p_o, p_draw)
+    return memo[key]
+
+
+def outcome_tensor(intelligence=range(4), table=None):
+    """ The exact [int_x, int_o, (xwin, owin, draw)] tensor for TttHeuristic against itself.
+
+    table is a tictac_policy.PolicyTable (or its path); by default the saved table is loaded, or
+    built in memory if it hasn't been saved yet.
+    """
+    import tictac_policy as ttpol
+    if table is None:
+        try:
+            masks = ttpol.PolicyTable().masks
+        except FileNotFoundError:
+            masks = ttpol.build_table()
+    elif isinstance(table, ttpol.PolicyTable):
+        masks = table.masks
+    else:
+        masks = ttpol.PolicyTable(table).masks
+
+    intelligence = list(intelligence)
+    level_masks = {level: masks[:, level].tolist() for level in intelligence}
+    tensor = np.zeros((len(intelligence), len(intelligence), 3))
+    for idx_x, int_x in enumerate(intelligence):
+        for idx_o, int_o in enumerate(intelligence):
+            tensor[idx_x, idx_o] = _solve_masks(0, 0, level_masks[int_x], level_masks[int_o], ttpol.position_index, {})
+    return tensor
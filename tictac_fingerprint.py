@@ -0,0 +1,125 @@
+""" Integer fingerprints of finished 3x3 games, and a counting index over them.  Other m,n,k
+boards are refused: their cells don't fit the 9-bit masks or the 4-bit move slots.
+
+A board key is the 18-bit state_key (xbits | obits << 9), optionally folded over the 8 symmetries.
+A history key packs the move sequence 4 bits per move (cell + 1, first move lowest), so the
+order of play is part of the key; at most 9 moves makes it 36 bits.
+
+Keys compare exactly (no NaN pitfalls) and hash in O(1), so counting N games is O(N).  There
+are fewer than 3**9 final boards and 255,168 possible games, so the index never holds more than
+that many entries however many games stream through it.
+"""
+from collections import Counter
+
+import numpy as np
+
+import tictac_bitboard as ttb
+
+_BIT_WEIGHTS = 1 << np.arange(9)
+_SYMMETRY_BITS = np.array(ttb.SYMMETRY_BITS, dtype=np.int64)     # (8, 512)
+
+
+def check_3x3(game):
+    """ Raises ValueError unless game is on the 3x3, three-in-a-row board these keys describe. """
+    shape = (getattr(game, "n_rows", 3), getattr(game, "n_cols", 3), getattr(game, "k", 3))
+    if shape != (3, 3, 3):
+        raise ValueError("Game fingerprints are for 3x3 tic-tac-toe, not {0}x{1} with k={2}".format(*shape))
+
+
+def board_key(xbits, obits, symmetric=False):
+    if symmetric:
+        return ttb.canonical(xbits, obits)[0]
+    return ttb.state_key(xbits, obits)
+
+
+def history_key(history, symmetric=False):
+    """ Packs a list of (row, col) moves; with symmetric=True, the smallest packing over the 8 symmetries. """
+    if any(not (0 <= row < 3 and 0 <= col < 3) for row, col in history):
+        raise ValueError("History keys are for 3x3 tic-tac-toe; {0} has moves off that board".format(list(history)))
+    cells = [3*int(row) + int(col) for row, col in history]
+    if not symmetric:
+        return _pack(cells)
+    return min(_pack([perm[cell] for cell in cells]) for perm in ttb.SYMMETRIES)
+
+
+def _pack(cells):
+    key = 0
+    for shift, cell in enumerate(cells):
+        key |= (cell + 1) << (4*shift)
+    return key
+
+
+def game_key(game, symmetric=False, include_history=False):
+    """ Fingerprint of a TttGame: its final board, or its full move order with include_history=True. """
+    check_3x3(game)
+    if include_history:
+        return history_key(game.history, symmetric)
+    xbits, obits = ttb.game_bits(game)
+    return board_key(xbits, obits, symmetric)
+
+
+def batch_board_keys(boards, symmetric=False):
+    """ Board keys for an (N, 9) array of 1 / -1 / 0 cells, as produced by tictac_batch. """
+    xbits = (boards == 1) @ _BIT_WEIGHTS
+    obits = (boards == -1) @ _BIT_WEIGHTS
+    if not symmetric:
+        return xbits | (obits << 9)
+    return (_SYMMETRY_BITS[:, xbits] | (_SYMMETRY_BITS[:, obits] << 9)).min(axis=0)
+
+
+def decode_board_key(key):
+    return ttb.bits_to_board(key & ttb.FULL_MASK, key >> 9)
+
+
+def decode_history_key(key):
+    moves = []
+    while key:
+        moves.append(ttb.BIT_CELLS[(key & 0xF) - 1])
+        key >>= 4
+    return moves
+
+
+class GameIndex():
+    """ Streams game fingerprints into counts.
+
+    symmetric folds rotations/reflections together; include_history counts move sequences rather
+    than final boards.  Use add() for TttGame objects and add_keys() for arrays of precomputed keys.
+    """
+
+    def __init__(self, symmetric=False, include_history=False):
+        self.symmetric = symmetric
+        self.include_history = include_history
+        self.counts = Counter()
+        self.n_games = 0
+
+    def add(self, game):
+        self.counts[game_key(game, self.symmetric, self.include_history)] += 1
+        self.n_games += 1
+
+    def add_keys(self, keys):
+        keys, counts = np.unique(np.asarray(keys), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.counts[key] += count
+        self.n_games += int(counts.sum())
+
+    @property
+    def n_unique(self):
+        return len(self.counts)
+
+    @property
+    def n_duplicates(self):
+        """ Games whose fingerprint had already been seen. """
+        return self.n_games - self.n_unique
+
+    def duplicate_counts(self):
+        """ {key: count} for every fingerprint seen more than once. """
+        return {key: count for key, count in self.counts.items() if count > 1}
+
+    def decode(self, key):
+        if self.include_history:
+            return decode_history_key(key)
+        return decode_board_key(key)
+
+    def most_common(self, n=10):
+        """ [(decoded board or move list, count), ...] for the n most frequent fingerprints. """
+        return [(self.decode(key), count) for key, count in self.counts.most_common(n)]
@@ -1,58 +1,276 @@
+import time
+from functools import lru_cache
+
 import numpy as np
 
+import tictac_bitboard as ttb
+
+# the four line directions through a box: along a row, down a column, and both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+@lru_cache(maxsize=None)
+def board_lines(n_rows, n_cols, k):
+    """ Every k-in-a-row window on an n_rows x n_cols board, as a (n_lines, k) array of flat
+    box indices (row*n_cols + col).  Ordered main diagonals, counter diagonals, rows, cols;
+    on 3x3 that is the order TttHeuristic has always scanned in.
+    """
+    lines = []
+    for drow, dcol in ((1, 1), (1, -1), (0, 1), (1, 0)):
+        for row in range(n_rows):
+            for col in range(n_cols):
+                end_row = row + (k-1)*drow
+                end_col = col + (k-1)*dcol
+                if 0 <= end_row < n_rows and 0 <= end_col < n_cols:
+                    lines.append([(row + step*drow)*n_cols + col + step*dcol for step in range(k)])
+    lines = np.array(lines, dtype=np.intp).reshape((-1, k))
+    lines.flags.writeable = False
+    return lines
+
+
+@lru_cache(maxsize=None)
+def line_incidence(n_rows, n_cols, k):
+    """ (n_boxes, n_lines) 0/1 matrix; entry [box, line] is 1 when the box lies on the line. """
+    lines = board_lines(n_rows, n_cols, k)
+    incidence = np.zeros((n_rows*n_cols, len(lines)), dtype=np.int32)
+    for idx, line in enumerate(lines):
+        incidence[line, idx] = 1
+    incidence.flags.writeable = False
+    return incidence
+
+
+@lru_cache(maxsize=None)
+def box_lines(n_rows, n_cols, k):
+    """ For each flat box index, the indices of the lines through it. """
+    return tuple(np.flatnonzero(row) for row in line_incidence(n_rows, n_cols, k))
+
+
+class IllegalMoveError(ValueError):
+    """ Raised by a headless game when a player asks for a move that isn't in legal_moves. """
+    def __init__(self, player, move):
+        super(IllegalMoveError, self).__init__("{0} made an illegal move: {1}".format(player.unique_name, move))
+        self.player = player
+        self.move = move
+
+
+class TttObserver():
+    """ Base class for game observers; override any of the hooks.  Attach with TttGame(..., observers=[...]).
+    Hooks fire from play() only -- lookahead through push/pop is not reported.
+    """
+    def on_move_start(self, game, player):
+        pass
+
+    def on_move_end(self, game, player, move, seconds):
+        """ seconds: time the player took to produce a legal move, retries included. """
+        pass
+
+    def on_illegal_move(self, game, player, move):
+        pass
+
+    def on_game_end(self, game, seconds):
+        """ Called once the game is decided; game.winning_player is None for a draw. """
+        pass
+
+
+class LegalMoves():
+    """ The open boxes as a sequence of (row, col), with O(1) `in` and remove().
+    remove() moves the last entry into the gap, so the order drifts as the game goes on.
+    """
+    def __init__(self, moves):
+        self._moves = list(moves)
+        self._index = {move: idx for idx, move in enumerate(self._moves)}
+
+    def __contains__(self, move):
+        return move in self._index
+
+    def __len__(self):
+        return len(self._moves)
+
+    def __iter__(self):
+        return iter(self._moves)
+
+    def __getitem__(self, idx):
+        return self._moves[idx]
+
+    def __repr__(self):
+        return "LegalMoves({0})".format(self._moves)
+
+    def remove(self, move):
+        """ Removes move; returns the slot it held, which restore() needs to undo this exactly. """
+        if move not in self._index:
+            raise ValueError("{0} is not a legal move".format(move))
+        idx = self._index.pop(move)
+        last = self._moves.pop()
+        if idx < len(self._moves):
+            self._moves[idx] = last
+            self._index[last] = idx
+        return idx
+
+    def restore(self, move, idx):
+        """ Inverse of remove(): puts move back in slot idx and the displaced entry back at the end. """
+        if idx < len(self._moves):
+            displaced = self._moves[idx]
+            self._moves.append(displaced)
+            self._index[displaced] = len(self._moves) - 1
+            self._moves[idx] = move
+        else:
+            self._moves.append(move)
+        self._index[move] = idx
+
+
 class TttGame():
     __class__ = "Tic-tac-toe Game"   # __class__ property of an instance
     # __name__ = "Tic-tac-NAME"  # the __name__ property will be "TttGame", regardless of whether this is here
 
-    def __init__(self, p1, p2, debug=False):
+    def __init__(self, p1, p2, debug=False, headless=False, n_rows=3, n_cols=3, k=3, observers=None):
+        """ An m,n,k game: n_rows x n_cols board, first to get k in a row wins.  Defaults are tic-tac-toe. """
+        if k > max(n_rows, n_cols):
+            raise ValueError("Can't fit {0} in a row on a {1}x{2} board".format(k, n_rows, n_cols))
         self.__name__ = "Tic-tac-toe: {0} vs. {1}".format(p1.unique_name, p2.unique_name) # __name__ property of instance
-        self.board = np.nan * np.ones((3,3))
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.k = k
+        self.lines = board_lines(n_rows, n_cols, k)
+        self._box_lines = box_lines(n_rows, n_cols, k)
+        # boxes held on each line: row 0 counts X, row 1 counts O; kept up to date move by move
+        self.line_counts = np.zeros((2, len(self.lines)), dtype=np.int32)
+        self.board = np.nan * np.ones((n_rows, n_cols))
         self.p1 = p1
         self.p2 = p2
         self.current_player = self.p1
         self.current_marker = 1
         self.winning_player = None
-        self.legal_moves = [
-            (0,0), (0,1), (0,2),
-            (1,0), (1,1), (1,2),
-            (2,0), (2,1), (2,2),
-            ]
+        self.legal_moves = LegalMoves((row, col) for row in range(n_rows) for col in range(n_cols))
         self.history = list()
+        self.is_finished = False
+        self._undo_stack = list()   # one entry per move in history; see _apply_move
         self._DEBUG_ = debug
+        self.headless = headless    # no console output; illegal moves raise IllegalMoveError
+        self.observers = tuple(observers) if observers else ()    # TttObserver instances
 
     def receive_input(self):
-        is_waiting = True
-        x,y = self.current_player.give_input(self)
-        if (x,y) in self.legal_moves:
-            self.legal_moves.remove((x,y))
-            self.board[x, y] = self.current_marker
-            self.history.append((x,y))
-            is_waiting = False
-        else:
+        """ Asks the current player until it gives a legal move, then places it.
+        A headless game doesn't ask twice: an illegal move raises IllegalMoveError.
+        """
+        while True:
+            x,y = self.current_player.give_input(self)
+            if (x,y) in self.legal_moves:
+                break
+            for observer in self.observers:
+                observer.on_illegal_move(self, self.current_player, (x,y))
+            if self.headless:
+                raise IllegalMoveError(self.current_player, (x,y))
             print("Not a legal move")
-            is_waiting = self.receive_input()
-        return is_waiting
+        self._apply_move(x, y)
+        return False    # no longer waiting
+
+    def _apply_move(self, x, y):
+        """ Places the current marker at (x, y) and updates everything that tracks the position. """
+        legal_idx = self.legal_moves.remove((x,y))
+        self._undo_stack.append((legal_idx, self.current_player, self.current_marker, self.winning_player, self.is_finished))
+        self._place_marker(x, y)
+        self.line_counts[0 if self.current_marker == 1 else 1, self._box_lines[x*self.n_cols + y]] += 1
+        self.history.append((x,y))
+
+    def _end_turn(self):
+        """ After a move: records a win or a draw, or else passes the turn. """
+        if self.check_winner():
+            # defines the winning player.  Player objects can check for themselves if they won
+            self.winning_player = self.current_player
+            self.is_finished = True
+        elif self.check_draw():
+            # game is a draw if all boxes filled without winner; winning_player remains None
+            self.is_finished = True
+        else:
+            self.change_player()
+
+    def push(self, move):
+        """ Plays move for the current player, in place: board, legal_moves, history, tallies, turn and result.
+        Undo with pop().  For lookahead, so nothing is copied.
+        """
+        if self.is_finished:
+            raise ValueError("Game has finished, start another.")
+        if move not in self.legal_moves:
+            raise IllegalMoveError(self.current_player, move)
+        self._apply_move(*move)
+        self._end_turn()
+
+    def pop(self):
+        """ Takes back the last move and restores the game exactly as it was before it; returns the move. """
+        if not self.history:
+            raise IndexError("No moves to take back")
+        x,y = self.history.pop()
+        legal_idx, self.current_player, self.current_marker, self.winning_player, self.is_finished = self._undo_stack.pop()
+        self.line_counts[0 if self.current_marker == 1 else 1, self._box_lines[x*self.n_cols + y]] -= 1
+        self._clear_marker(x, y)
+        self.legal_moves.restore((x,y), legal_idx)
+        return x,y
+
+    def _place_marker(self, x, y):
+        self.board[x, y] = self.current_marker
+
+    def _clear_marker(self, x, y):
+        self.board[x, y] = np.nan
+
+    def line_tallies(self, marker):
+        """ Per-line (own, opponent, empty) box counts, from marker's point of view. """
+        own = self.line_counts[0 if marker == 1 else 1]
+        opp = self.line_counts[1 if marker == 1 else 0]
+        return own, opp, self.k - own - opp
+
+    def completing_moves(self, marker):
+        """ Every (row, col) that would give marker k-in-a-row, one entry per line, in line order. """
+        own, opp, empty = self.line_tallies(marker)
+        flat_board = self.board.reshape(-1)
+        moves = []
+        for line in np.flatnonzero((own == self.k - 1) & (opp == 0)):
+            boxes = self.lines[line]
+            box = boxes[np.isnan(flat_board[boxes])][0]
+            moves.append(divmod(int(box), self.n_cols))
+        return moves
+
+    def fork_moves(self, marker):
+        """ Every empty (row, col) that would leave marker with two or more completing moves. """
+        own, opp, empty = self.line_tallies(marker)
+        wins = ((own == self.k - 1) & (opp == 0)).astype(np.int32)
+        halves = ((own == self.k - 2) & (opp == 0)).astype(np.int32)
+        # playing a box turns the half-open lines through it into wins, and fills the wins through it
+        n_wins = wins.sum() + line_incidence(self.n_rows, self.n_cols, self.k) @ (halves - wins)
+        is_fork = np.isnan(self.board.reshape(-1)) & (n_wins > 1)
+        return [divmod(int(box), self.n_cols) for box in np.flatnonzero(is_fork)]
+
+    def _run_length(self, row, col, drow, dcol, marker):
+        """ How many boxes in a row hold `marker`, stepping from (row, col) in direction (drow, dcol). """
+        length = 0
+        row += drow
+        col += dcol
+        while 0 <= row < self.n_rows and 0 <= col < self.n_cols and self.board[row, col] == marker:
+            length += 1
+            row += drow
+            col += dcol
+        return length
 
     def check_winner(self):
-        """ Checks if any row, column, or diagonal has 3-in-a-row. """
+        """ Checks whether the last move completed k-in-a-row.
+        Only the four lines through that move can have changed, so only those are walked.
+        """
         is_winner = False
-        if np.any(np.abs(self.board.sum(axis=0)) == 3):
-            # checks columns
-            is_winner = True
-        elif np.any(np.abs(self.board.sum(axis=1)) == 3):
-            # checks rows
-            is_winner = True
-        elif np.abs(np.sum(self.board[0,0] + self.board[1,1] + self.board[2,2])) == 3:
-            # checks main diagonal
-            is_winner = True
-        elif np.abs(np.sum(self.board[2,0] + self.board[1,1] + self.board[0,2])) == 3:
-            # checks perpendicular diagonal
-            is_winner = True
+        if self.history:
+            row, col = self.history[-1]
+            marker = self.board[row, col]
+            for drow, dcol in DIRECTIONS:
+                run = 1 + self._run_length(row, col, drow, dcol, marker) + self._run_length(row, col, -drow, -dcol, marker)
+                if run >= self.k:
+                    is_winner = True
+                    break
         if self._DEBUG_ and is_winner:
             print("The winner is {0}".format(self.current_player.unique_name))
-            pass
         return is_winner
 
+    def check_draw(self):
+        """ True once every box is filled; only meaningful after check_winner has failed. """
+        return len(self.legal_moves) == 0
+
     def change_player(self):
         if self.current_player == self.p1:
             self.current_player = self.p2
@@ -63,21 +281,83 @@ class TttGame():
         self.current_marker = -1 * self.current_marker
 
     def play(self):
-        if self.winning_player is None:   
-            self.current_player.examine_board(self)
-            is_waiting = True
-            while is_waiting:
-                is_waiting = self.receive_input()
-            is_winner = self.check_winner()
-            if is_winner:
-                # defines the winning player.  Player objects can check for themselves if they won
-                self.winning_player = self.current_player
-            elif np.isnan(self.board).sum() == 0:
-                # game is a draw if all boxes filled without winner
-#                print("The game was a Draw")
-                pass # winning_player remains None
-            else: 
-                self.change_player()
-                self.play()
+        """ Plays the game out, one move per loop; returns the winning player (None for a draw). """
+        if self.is_finished:
+            if not self.headless:
+                print("Game has finished, start another.")
+            return self.winning_player
+        if not self.observers:
+            while not self.is_finished:
+                self.current_player.examine_board(self)
+                self.receive_input()
+                self._end_turn()
+            return self.winning_player
+
+        # same loop, timed and reported
+        game_started = time.perf_counter()
+        while not self.is_finished:
+            player = self.current_player
+            for observer in self.observers:
+                observer.on_move_start(self, player)
+            player.examine_board(self)
+            move_started = time.perf_counter()
+            self.receive_input()
+            elapsed = time.perf_counter() - move_started
+            for observer in self.observers:
+                observer.on_move_end(self, player, self.history[-1], elapsed)
+            self._end_turn()
+        elapsed = time.perf_counter() - game_started
+        for observer in self.observers:
+            observer.on_game_end(self, elapsed)
+        return self.winning_player
+
+
+class TttBitGame(TttGame):
+    """ Same rules and interface as TttGame, but state is held as two 9-bit integers (X and O).
+    3x3 only.
+
+    Win/draw checks are O(1) lookups.  The NumPy `board` is only built when something asks for it
+    (e.g. TttHuman printing, TttHeuristic scanning), and is cached until the next move.
+    """
+    __class__ = "Tic-tac-toe Game (bitboard)"
+
+    def __init__(self, *args, **kwargs):
+        if (kwargs.get("n_rows", 3), kwargs.get("n_cols", 3), kwargs.get("k", 3)) != (3, 3, 3):
+            raise ValueError("TttBitGame only plays 3x3 tic-tac-toe; use TttGame for other boards")
+        self.xbits = 0
+        self.obits = 0
+        self._board_cache = None
+        super(TttBitGame, self).__init__(*args, **kwargs)
+
+    @property
+    def board(self):
+        if self._board_cache is None:
+            self._board_cache = ttb.bits_to_board(self.xbits, self.obits)
+        return self._board_cache
+
+    @board.setter
+    def board(self, board):
+        self.xbits, self.obits = ttb.board_to_bits(board)
+        self._board_cache = None
+
+    def _place_marker(self, x, y):
+        if self.current_marker == 1:
+            self.xbits |= ttb.CELL_BITS[x][y]
         else:
-            print("Game has finished, start another.")
+            self.obits |= ttb.CELL_BITS[x][y]
+        self._board_cache = None
+
+    def _clear_marker(self, x, y):
+        self.xbits &= ~ttb.CELL_BITS[x][y]
+        self.obits &= ~ttb.CELL_BITS[x][y]
+        self._board_cache = None
+
+    def check_winner(self):
+        """ Checks if either player holds a full row, column, or diagonal. """
+        is_winner = ttb.WIN_TABLE[self.xbits] or ttb.WIN_TABLE[self.obits]
+        if self._DEBUG_ and is_winner:
+            print("The winner is {0}".format(self.current_player.unique_name))
+        return is_winner
+
+    def check_draw(self):
+        return (self.xbits | self.obits) == ttb.FULL_MASK
@@ -0,0 +1,139 @@
+""" Append-only binary log of finished 3x3 games, read back through a memory map.
+
+File layout: an 8-byte magic header, then fixed-size little-endian records of RECORD_DTYPE.
+The move list is packed 4 bits per move (cell + 1, first move lowest, as in
+tictac_fingerprint.history_key), so a whole game is one uint64 plus a few bytes of metadata.
+Because records are fixed-size and unaligned-packed, the reader maps the file straight onto a
+NumPy structured array and every column is a zero-copy view.
+"""
+import os
+
+import numpy as np
+
+import tictac_fingerprint as ttfp
+
+MAGIC = b"TTTLOG1\0"
+HEADER_SIZE = len(MAGIC)
+
+RECORD_DTYPE = np.dtype([
+    ("moves", "<u8"),       # packed history, 4 bits per move
+    ("n_moves", "u1"),
+    ("outcome", "i1"),      # 1 X won, -1 O won, 0 draw
+    ("player_x", "<u2"),
+    ("player_o", "<u2"),
+    ("seed", "<u8"),
+    ])
+
+
+def game_outcome(game):
+    """ 1 / -1 / 0 for an X win / O win / draw.  Read from the marker rather than the player,
+    since one player object may be playing both sides.
+    """
+    if game.winning_player is None:
+        return 0
+    # the game stops without changing player, so the winner's marker is still current
+    return game.current_marker
+
+
+class GameLogWriter():
+    """ Buffers records and appends them to `path` in blocks; use as a context manager or call close(). """
+
+    def __init__(self, path, buffer_size=65536):
+        self.path = path
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            with open(path, "rb") as fh:
+                if fh.read(HEADER_SIZE) != MAGIC:
+                    raise ValueError("{0} is not a game log".format(path))
+        self._fh = open(path, "ab")
+        if is_new:
+            self._fh.write(MAGIC)
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._n_buffered = 0
+
+    def write(self, game, player_x=0, player_o=0, seed=0):
+        """ Appends one finished 3x3 TttGame; games on other boards raise ValueError. """
+        ttfp.check_3x3(game)
+        record = self._buffer[self._n_buffered]
+        record["moves"] = ttfp.history_key(game.history)
+        record["n_moves"] = len(game.history)
+        record["outcome"] = game_outcome(game)
+        record["player_x"] = player_x
+        record["player_o"] = player_o
+        record["seed"] = seed
+        self._n_buffered += 1
+        if self._n_buffered == len(self._buffer):
+            self.flush()
+
+    def write_records(self, records):
+        """ Appends an array of RECORD_DTYPE records as-is. """
+        self.flush()
+        np.asarray(records, dtype=RECORD_DTYPE).tofile(self._fh)
+
+    def flush(self):
+        if self._n_buffered:
+            self._buffer[:self._n_buffered].tofile(self._fh)
+            self._n_buffered = 0
+        self._fh.flush()
+
+    def close(self):
+        self.flush()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameLog():
+    """ Read-only, memory-mapped view of a log file.  Columns are views into the mapping. """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            if fh.read(HEADER_SIZE) != MAGIC:
+                raise ValueError("{0} is not a game log".format(path))
+        n_records = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if n_records:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n_records,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def packed_moves(self):
+        return self.records["moves"]
+
+    @property
+    def n_moves(self):
+        return self.records["n_moves"]
+
+    @property
+    def outcome(self):
+        return self.records["outcome"]
+
+    @property
+    def player_x(self):
+        return self.records["player_x"]
+
+    @property
+    def player_o(self):
+        return self.records["player_o"]
+
+    @property
+    def seed(self):
+        return self.records["seed"]
+
+    def moves(self, start=0, stop=None):
+        """ Unpacks games start:stop into an (N, 9) int8 array of cells (3*row + col), -1 after the last move. """
+        packed = np.asarray(self.records["moves"][start:stop])
+        shifts = 4 * np.arange(9, dtype=np.uint64)
+        return ((packed[:, None] >> shifts) & np.uint64(0xF)).astype(np.int8) - 1
+
+    def history(self, idx):
+        """ The (row, col) move list of one game, as in TttGame.history. """
+        return ttfp.decode_history_key(int(self.records["moves"][idx]))
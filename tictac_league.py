@@ -0,0 +1,265 @@
+""" Glicko-rated league for ranking many player configurations without a full round-robin.
+
+Players are described by plain dicts, so a league can be saved as JSON and rebuilt elsewhere:
+
+    {"kind": "heuristic", "intelligence": 2}
+    {"kind": "perfect"}
+    {"kind": "search", "max_depth": 3, "time_limit": None}
+    {"kind": "mcts", "playouts": 500}
+    {"kind": "qlearn", "path": "tictac_qtable.npy"}
+
+Each round pairs every player at most once, most uncertain ratings first, each with the
+opponent whose result would say the most about it: a close expected score and a wide combined
+rating deviation.  A match is a few games with colours alternating; ratings are updated with
+Glicko-1 as each round's results come in (Elo is the special case where the deviation never
+shrinks).  Match seeds derive from (league seed, match number), so a league resumed from a
+snapshot carries on exactly as if it hadn't stopped.
+
+    league = League({"h{0}".format(level): {"kind": "heuristic", "intelligence": level} for level in range(4)})
+    league.run(target_rd=60, snapshot_path="league.json")
+    league = League.load("league.json")     # later, to carry on
+"""
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import tictac_game as ttg
+
+SNAPSHOT_VERSION = 1
+SMALL_BOARD_KINDS = ("perfect", "qlearn")      # players that only know the 3x3 board
+INITIAL_RATING = 1500.
+INITIAL_RD = 350.
+_Q = math.log(10) / 400
+
+
+def _g(rd):
+    return 1 / math.sqrt(1 + 3 * _Q * _Q * rd * rd / (math.pi * math.pi))
+
+
+def expected_score(rating, opp_rating, opp_rd):
+    return 1 / (1 + 10 ** (-_g(opp_rd) * (rating - opp_rating) / 400))
+
+
+class Rating():
+    __slots__ = ("rating", "rd", "games", "score")
+
+    def __init__(self, rating=INITIAL_RATING, rd=INITIAL_RD, games=0, score=0.):
+        self.rating = rating
+        self.rd = rd
+        self.games = games
+        self.score = score      # points won: 1 a win, 0.5 a draw
+
+    def updated(self, opponent, scores):
+        """ New (rating, rd) after `scores` (one per game) against one opponent, Glicko-1. """
+        g = _g(opponent.rd)
+        expected = expected_score(self.rating, opponent.rating, opponent.rd)
+        d_inv = _Q * _Q * g * g * expected * (1 - expected) * len(scores)
+        precision = 1 / (self.rd * self.rd) + d_inv
+        rating = self.rating + _Q / precision * g * sum(score - expected for score in scores)
+        return rating, math.sqrt(1 / precision)
+
+    def to_dict(self):
+        return {"rating": self.rating, "rd": self.rd, "games": self.games, "score": self.score}
+
+
+def make_player(spec, name, seed=None):
+    """ A fresh, quiet TttPlayer for a spec dict. """
+    kind = spec["kind"]
+    if kind == "heuristic":
+        from tictac_players import TttHeuristic
+        player = TttHeuristic(name, rng=random.Random(seed), verbose=False)
+        player.INTELLIGENCE = spec["intelligence"]
+        if spec.get("policy_path"):
+            from tictac_policy import PolicyTable
+            player.policy = PolicyTable(spec["policy_path"])
+    elif kind == "perfect":
+        from tictac_solver import TttPerfect
+        player = TttPerfect(name, rng=random.Random(seed), verbose=False)
+    elif kind == "search":
+        from tictac_search import TttSearch
+        # a spec without a time_limit keeps TttSearch's own
+        limits = {key: spec[key] for key in ("time_limit", "max_depth") if key in spec}
+        player = TttSearch(name, verbose=False, **limits)
+    elif kind == "mcts":
+        from tictac_mcts import TttMcts
+        player = TttMcts(name, playouts=spec.get("playouts", 4000), time_limit=spec.get("time_limit"), seed=seed, verbose=False)
+    elif kind == "qlearn":
+        import tictac_learn as ttlearn
+        player = ttlearn.TttQLearner(name, q=ttlearn.load_table(spec.get("path", ttlearn.DEFAULT_PATH)), verbose=False)
+    else:
+        raise ValueError("Unknown player kind {0!r}".format(kind))
+    return player
+
+
+def league_seed(seed, stream, idx):
+    """ Independent seeds from one league seed: stream 0 seeds matches, stream 1 round pairings. """
+    state = np.random.SeedSequence(seed, spawn_key=(stream, idx)).generate_state(2, dtype=np.uint64)
+    return int(state[0]) ^ (int(state[1]) << 64)
+
+
+def _play_match(job):
+    """ Plays one match; returns the first player's score in each game. """
+    name_a, spec_a, name_b, spec_b, n_games, seed, board = job
+    rng = random.Random(seed)
+    player_a = make_player(spec_a, name_a, rng.getrandbits(64))
+    player_b = make_player(spec_b, name_b, rng.getrandbits(64))
+    game_class = ttg.TttBitGame if board == (3, 3, 3) else ttg.TttGame
+    scores = []
+    for idx in range(n_games):
+        players = (player_a, player_b) if idx % 2 == 0 else (player_b, player_a)
+        game = game_class(*players, headless=True, n_rows=board[0], n_cols=board[1], k=board[2])
+        game.play()
+        if game.winning_player is None:
+            scores.append(0.5)
+        else:
+            scores.append(1. if game.winning_player is player_a else 0.)
+    return scores
+
+
+class League():
+    def __init__(self, players=None, seed=0, games_per_match=10, n_rows=3, n_cols=3, k=3):
+        self.specs = {}         # name -> spec dict
+        self.ratings = {}       # name -> Rating
+        self.seed = seed
+        self.games_per_match = games_per_match
+        self.board = (n_rows, n_cols, k)
+        self.n_rounds = 0
+        self.n_matches = 0
+        self.n_games = 0
+        for name, spec in (players or {}).items():
+            self.add_player(name, spec)
+
+    def add_player(self, name, spec):
+        """ New players start unrated, and so are scheduled first. """
+        if name in self.specs:
+            raise ValueError("{0} is already in the league".format(name))
+        if spec["kind"] in SMALL_BOARD_KINDS and self.board != (3, 3, 3):
+            raise ValueError("{0} players only play on 3x3, not {1}x{2} (k={3})".format(spec["kind"], *self.board))
+        self.specs[name] = dict(spec)
+        self.ratings[name] = Rating()
+
+    def _information(self, name_a, name_b):
+        """ How much a match would tell us: E(1 - E) weighted by the combined rating variance. """
+        rating_a = self.ratings[name_a]
+        rating_b = self.ratings[name_b]
+        combined = math.sqrt(rating_a.rd ** 2 + rating_b.rd ** 2)
+        expected = expected_score(rating_a.rating, rating_b.rating, combined)
+        return expected * (1 - expected) * combined * combined
+
+    def pairings(self):
+        """ This round's matches: each player at most once, the most uncertain picking first. """
+        rng = random.Random(league_seed(self.seed, 1, self.n_rounds))
+        order = sorted(self.specs, key=lambda name: (-self.ratings[name].rd, self.ratings[name].games, name))
+        unpaired = set(order)
+        pairs = []
+        for name in order:
+            if name not in unpaired:
+                continue
+            unpaired.discard(name)
+            if not unpaired:
+                break
+            opponents = sorted(unpaired)
+            scores = [self._information(name, opp) for opp in opponents]
+            best = max(scores)
+            opponent = rng.choice([opp for opp, score in zip(opponents, scores) if score == best])
+            unpaired.discard(opponent)
+            pairs.append((name, opponent))
+        return pairs
+
+    def record(self, name_a, name_b, scores):
+        """ Folds one match (name_a's score per game) into both ratings. """
+        rating_a = self.ratings[name_a]
+        rating_b = self.ratings[name_b]
+        new_a = rating_a.updated(rating_b, scores)
+        new_b = rating_b.updated(rating_a, [1 - score for score in scores])
+        rating_a.rating, rating_a.rd = new_a
+        rating_b.rating, rating_b.rd = new_b
+        rating_a.games += len(scores)
+        rating_b.games += len(scores)
+        rating_a.score += sum(scores)
+        rating_b.score += len(scores) - sum(scores)
+        self.n_matches += 1
+        self.n_games += len(scores)
+
+    def play_round(self, pool=None):
+        jobs = []
+        pairs = self.pairings()
+        for match_idx, (name_a, name_b) in enumerate(pairs, start=self.n_matches):
+            jobs.append((name_a, self.specs[name_a], name_b, self.specs[name_b],
+                         self.games_per_match, league_seed(self.seed, 0, match_idx), self.board))
+        results = map(_play_match, jobs) if pool is None else pool.map(_play_match, jobs)
+        for (name_a, name_b), scores in zip(pairs, results):
+            self.record(name_a, name_b, scores)
+        self.n_rounds += 1
+        return pairs
+
+    def run(self, n_rounds=None, target_rd=None, max_games=None, workers=1, snapshot_path=None):
+        """ Plays rounds until n_rounds more have been played, every rating deviation is below
+        target_rd, or max_games games have been played in total -- whichever comes first.
+        With snapshot_path, the league is saved after every round.  workers=1 runs in-process.
+        """
+        if n_rounds is None and target_rd is None and max_games is None:
+            raise ValueError("Give n_rounds, target_rd or max_games, or the league never ends")
+        pool = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+        try:
+            played = 0
+            while len(self.specs) > 1:
+                if n_rounds is not None and played >= n_rounds:
+                    break
+                if target_rd is not None and max(rating.rd for rating in self.ratings.values()) < target_rd:
+                    break
+                if max_games is not None and self.n_games >= max_games:
+                    break
+                self.play_round(pool)
+                played += 1
+                if snapshot_path is not None:
+                    self.save(snapshot_path)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return self.standings()
+
+    def standings(self):
+        """ [(name, rating, rd, games)], best first. """
+        table = [(name, rating.rating, rating.rd, rating.games) for name, rating in self.ratings.items()]
+        return sorted(table, key=lambda row: -row[1])
+
+    def to_dict(self):
+        return {
+            "version": SNAPSHOT_VERSION,
+            "seed": self.seed,
+            "games_per_match": self.games_per_match,
+            "board": list(self.board),
+            "n_rounds": self.n_rounds,
+            "n_matches": self.n_matches,
+            "n_games": self.n_games,
+            "players": {name: {"spec": self.specs[name], **self.ratings[name].to_dict()} for name in self.specs},
+            }
+
+    def save(self, path):
+        """ Writes a JSON snapshot; the old one is only replaced once the new one is complete. """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(self.to_dict(), fh, indent=1)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as fh:
+            state = json.load(fh)
+        if state.get("version") != SNAPSHOT_VERSION:
+            raise ValueError("{0} is not a version {1} league snapshot".format(path, SNAPSHOT_VERSION))
+        n_rows, n_cols, k = state["board"]
+        league = cls(seed=state["seed"], games_per_match=state["games_per_match"], n_rows=n_rows, n_cols=n_cols, k=k)
+        for name, entry in state["players"].items():
+            league.specs[name] = entry["spec"]
+            league.ratings[name] = Rating(entry["rating"], entry["rd"], entry["games"], entry["score"])
+        league.n_rounds = state["n_rounds"]
+        league.n_matches = state["n_matches"]
+        league.n_games = state["n_games"]
+        return league
@@ -0,0 +1,251 @@
+""" Tabular Q-learning by batched self-play and play against TttHeuristic.
+
+States are the 627 positions where a move is due, folded over the 8 symmetries (the same
+canonical positions tictac_solver solves); the Q-table is a dense (n_states, 9) float32 array
+with actions in the canonical frame.  A state's Q-values are from the point of view of the side
+to move, and the next state of a transition is that same side's next turn, so one table serves
+both X and O.
+
+Episodes are played many at a time on (N, 9) boards, with tictac_batch supplying the heuristic
+opponents' moves.  Transitions go into a preallocated ring buffer and are learned from by
+sampled minibatch updates.
+"""
+import os
+import sys
+
+import numpy as np
+
+import tictac_batch as ttbatch
+import tictac_bitboard as ttb
+from tictac_players import TttPlayer
+from tictac_policy import position_index
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictac_qtable.npy")
+_POWERS = 3 ** np.arange(9)
+_SYMMETRIES = np.array(ttb.SYMMETRIES, dtype=np.intp)              # [sym, cell] -> cell
+_INVERSE = np.array(ttb.INVERSE_SYMMETRY, dtype=np.intp)
+
+
+def _build_state_index():
+    """ Canonical ids for every reachable position where a move is due.
+
+    Returns (state_id, state_sym, legal): per base-3 position index, the canonical state id (-1 if
+    none) and the symmetry into its frame; and per state, the legal canonical actions.
+    """
+    state_id = np.full(3**9, -1, dtype=np.int32)
+    state_sym = np.zeros(3**9, dtype=np.int8)
+    canonical_ids = {}
+    legal = []
+    stack = [(0, 0)]
+    while stack:
+        xbits, obits = stack.pop()
+        idx = position_index(xbits, obits)
+        if state_id[idx] >= 0 or ttb.WIN_TABLE[xbits] or ttb.WIN_TABLE[obits] or ttb.is_full(xbits, obits):
+            continue
+        key, sym = ttb.canonical(xbits, obits)
+        if key not in canonical_ids:
+            canonical_ids[key] = len(legal)
+            taken = (key & ttb.FULL_MASK) | (key >> 9)
+            legal.append([not (taken >> cell) & 1 for cell in range(9)])
+        state_id[idx] = canonical_ids[key]
+        state_sym[idx] = sym
+
+        x_to_move = bin(xbits).count("1") == bin(obits).count("1")
+        for bit in ttb.CELL_BITS_FLAT:
+            if not (xbits | obits) & bit:
+                stack.append((xbits | bit, obits) if x_to_move else (xbits, obits | bit))
+    return state_id, state_sym, np.array(legal, dtype=bool)
+
+
+STATE_ID, STATE_SYM, LEGAL = _build_state_index()
+N_STATES = len(LEGAL)
+
+
+def board_states(boards):
+    """ (state ids, symmetries) for an (N, 9) array of 1 / -1 / 0 boards. """
+    index = np.where(boards == -1, 2, boards).astype(np.int64) @ _POWERS
+    return STATE_ID[index], STATE_SYM[index]
+
+
+class ReplayBuffer():
+    """ Fixed-size ring buffer of (state, action, reward, next_state, done) transitions. """
+
+    def __init__(self, capacity=2**18):
+        self.capacity = capacity
+        self.state = np.zeros(capacity, dtype=np.int32)
+        self.action = np.zeros(capacity, dtype=np.int8)
+        self.reward = np.zeros(capacity, dtype=np.float32)
+        self.next_state = np.zeros(capacity, dtype=np.int32)
+        self.done = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        self._head = 0
+
+    def add(self, state, action, reward, next_state, done):
+        n_new = len(state)
+        slots = (self._head + np.arange(n_new)) % self.capacity
+        self.state[slots] = state
+        self.action[slots] = action
+        self.reward[slots] = reward
+        self.next_state[slots] = next_state
+        self.done[slots] = done
+        self._head = (self._head + n_new) % self.capacity
+        self.size = min(self.size + n_new, self.capacity)
+
+    def sample(self, n_samples, rng):
+        idx = rng.integers(self.size, size=n_samples)
+        return self.state[idx], self.action[idx], self.reward[idx], self.next_state[idx], self.done[idx]
+
+
+def greedy_actions(q, states):
+    """ Best legal canonical action per state. """
+    values = np.where(LEGAL[states], q[states], -np.inf)
+    return np.argmax(values, axis=1)
+
+
+def _choose(q, boards, epsilon, rng):
+    """ Epsilon-greedy moves for an (N, 9) batch; returns (cells, state ids, canonical actions). """
+    states, syms = board_states(boards)
+    actions = greedy_actions(q, states)
+    explore = rng.random(len(states)) < epsilon
+    if explore.any():
+        keys = rng.random((int(explore.sum()), 9))
+        keys[~LEGAL[states[explore]]] = -1.
+        actions[explore] = np.argmax(keys, axis=1)
+    cells = _SYMMETRIES[_INVERSE[syms], actions]
+    return cells, states, actions
+
+
+def play_episodes(q, n_games, opponent_level=None, learner_marker=1, epsilon=0.1, rng=None, replay=None):
+    """ Plays n_games at once.  opponent_level None is self-play (the table moves for both sides);
+    otherwise the learner plays learner_marker against TttHeuristic at that INTELLIGENCE.
+
+    Learner transitions go into `replay` if given.  Returns the outcome per game (1 / -1 / 0).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    boards = np.zeros((n_games, 9), dtype=np.int8)
+    outcome = np.zeros(n_games, dtype=np.int8)
+    live = np.ones(n_games, dtype=bool)
+    # the learner's last (state, action) per game, for each marker, waiting for its next state
+    pending = {marker: (np.full(n_games, -1, dtype=np.int32), np.zeros(n_games, dtype=np.int8)) for marker in (1, -1)}
+    learns = {1: opponent_level is None or learner_marker == 1, -1: opponent_level is None or learner_marker == -1}
+
+    def close(games, marker, reward, next_states=None):
+        """ Ends the pending transitions of `marker` in `games`; next_states None means terminal. """
+        states, actions = pending[marker]
+        waiting = states[games] >= 0
+        games = games[waiting]
+        if replay is not None and len(games):
+            done = next_states is None
+            replay.add(states[games], actions[games], np.full(len(games), reward, dtype=np.float32),
+                       0 if done else next_states[waiting], np.full(len(games), done))
+        states[games] = -1
+
+    marker = 1
+    for ply in range(9):
+        games = np.flatnonzero(live)
+        if len(games) == 0:
+            break
+        if learns[marker]:
+            cells, states, actions = _choose(q, boards[games], epsilon, rng)
+            close(games, marker, 0., states)
+            pending[marker][0][games] = states
+            pending[marker][1][games] = actions
+        else:
+            cells = ttbatch.choose_moves(boards[games], marker, np.full(len(games), opponent_level), rng)
+        boards[games, cells] = marker
+
+        won = (boards[games][:, ttbatch.LINES] == marker).all(axis=2).any(axis=1)
+        drawn = ~won & (boards[games] != 0).all(axis=1)
+        for finished, reward in ((games[won], 1.), (games[drawn], 0.)):
+            outcome[finished] = marker if reward else 0
+            live[finished] = False
+            if learns[marker]:
+                close(finished, marker, reward)
+            if learns[-marker]:
+                close(finished, -marker, -reward)
+        marker = -marker
+    return outcome
+
+
+def update(q, replay, n_samples, alpha, gamma, rng):
+    """ One minibatch Q-learning step: Q[s, a] += alpha * (r + gamma * max_a' Q[s', a'] - Q[s, a]). """
+    state, action, reward, next_state, done = replay.sample(n_samples, rng)
+    future = np.where(LEGAL[next_state], q[next_state], -np.inf).max(axis=1)
+    target = reward + gamma * np.where(done, 0., future)
+    # a (state, action) drawn several times gets the mean of its errors, not their sum
+    flat = state * 9 + action
+    repeats = np.bincount(flat, minlength=q.size)[flat]
+    np.add.at(q.reshape(-1), flat, alpha * (target - q[state, action]) / repeats)
+
+
+def train(q=None, n_rounds=200, batch_games=2048, opponent_levels=(3,), self_play=True,
+          epsilon=(0.3, 0.02), alpha=0.5, gamma=0.99, replay_size=2**18, updates=8, batch_updates=4096, seed=None):
+    """ Alternates batched episode generation and minibatch updates; returns the Q-table.
+
+    Each round plays batch_games games in one setup, cycling through self-play and every opponent
+    level with the learner as X and as O.  epsilon decays linearly from epsilon[0] to epsilon[1].
+    """
+    rng = np.random.default_rng(seed)
+    if q is None:
+        q = np.zeros((N_STATES, 9), dtype=np.float32)
+    replay = ReplayBuffer(replay_size)
+    setups = [(None, 1)] if self_play else []
+    setups += [(level, marker) for level in opponent_levels for marker in (1, -1)]
+    for round_idx in range(n_rounds):
+        eps = epsilon[0] + (epsilon[1] - epsilon[0]) * round_idx / max(n_rounds - 1, 1)
+        level, marker = setups[round_idx % len(setups)]
+        play_episodes(q, batch_games, level, marker, eps, rng, replay)
+        for _ in range(updates):
+            update(q, replay, batch_updates, alpha, gamma, rng)
+    return q
+
+
+def evaluate(q, opponent_level, n_games=10000, seed=None):
+    """ Greedy play against TttHeuristic; returns {"X": (win, loss, draw), "O": (...)} rates. """
+    rng = np.random.default_rng(seed)
+    results = {}
+    for marker, name in ((1, "X"), (-1, "O")):
+        outcome = play_episodes(q, n_games, opponent_level, marker, 0., rng) * marker
+        results[name] = tuple(float((outcome == result).mean()) for result in (1, -1, 0))
+    return results
+
+
+def save_table(q, path=DEFAULT_PATH):
+    np.save(path, q.astype(np.float32))
+    return path
+
+
+def load_table(path=DEFAULT_PATH):
+    q = np.load(path)
+    if q.shape != (N_STATES, 9):
+        raise ValueError("{0} is not a Q-table".format(path))
+    return q
+
+
+class TttQLearner(TttPlayer):
+    """ Plays greedily from a learned Q-table (see train / load_table). """
+
+    def __init__(self, *args, q=None, **kwargs):
+        super(TttQLearner, self).__init__(*args, **kwargs)
+        self.q = np.zeros((N_STATES, 9), dtype=np.float32) if q is None else q
+        self.__name__ = "Q-learning Bot: {0}".format(self.unique_name)
+
+    def _best_cell(self, game):
+        xbits, obits = ttb.game_bits(game)
+        idx = position_index(xbits, obits)
+        state = STATE_ID[idx]
+        values = np.where(LEGAL[state], self.q[state], -np.inf)
+        return int(_SYMMETRIES[_INVERSE[STATE_SYM[idx]], np.argmax(values)])
+
+    def move_distribution(self, game):
+        return [(ttb.BIT_CELLS[self._best_cell(game)], 1.)]
+
+    def give_input(self, game):
+        return ttb.BIT_CELLS[self._best_cell(game)]
+
+
+if __name__ == "__main__":
+    q = train(seed=0)
+    print("vs INTELLIGENCE 3:", evaluate(q, 3, seed=1))
+    print("Wrote", save_table(q, *sys.argv[1:2]))
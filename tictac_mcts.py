@@ -0,0 +1,142 @@
+""" Monte Carlo Tree Search player.
+
+The tree is grown on the live game through TttGame.push/pop (the game is always restored before
+give_input returns).  Each expanded leaf is scored by a batch of random playouts run together as
+NumPy arrays: every playout is a random fill order of the empty boxes, and the winner is whoever
+completes a line first.  The subtree under the move actually played is kept for the next turn.
+"""
+import math
+import time
+
+import numpy as np
+
+from tictac_players import TttPlayer
+
+
+def rollout_wins(game, n_playouts, rng):
+    """ Plays n_playouts random games from the current position at once.
+
+    Returns the number won by the player who made the last move (draws count half).
+    """
+    flat_board = np.nan_to_num(np.asarray(game.board, dtype=float).reshape(-1)).astype(np.int8)
+    empty = np.flatnonzero(flat_board == 0)
+    last_mover = -game.current_marker
+    if len(empty) == 0:
+        return 0.5 * n_playouts
+
+    # fill order: ply[i, j] is when playout i fills empty box j; the side to move takes even plies
+    ply = np.argsort(rng.random((n_playouts, len(empty))), axis=1).argsort(axis=1)
+    times = np.full((n_playouts, len(flat_board)), -1, dtype=np.int32)
+    times[:, empty] = ply
+    colors = np.broadcast_to(flat_board, times.shape).copy()
+    colors[:, empty] = np.where(ply % 2 == 0, game.current_marker, last_mover)
+
+    line_colors = colors[:, game.lines]
+    finished_at = np.where((line_colors == line_colors[:, :, :1]).all(axis=2), times[:, game.lines].max(axis=2), np.iinfo(np.int32).max)
+    first = np.argmin(finished_at, axis=1)
+    rows = np.arange(n_playouts)
+    decided = finished_at[rows, first] < np.iinfo(np.int32).max
+    winner = np.where(decided, line_colors[rows, first, 0], 0)
+    return float((winner == last_mover).sum()) + 0.5 * float((winner == 0).sum())
+
+
+class MctsNode():
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, parent, legal_moves):
+        self.move = move
+        self.parent = parent
+        self.children = {}
+        self.untried = list(legal_moves)
+        self.visits = 0
+        self.wins = 0.    # from the point of view of whoever played self.move
+
+    def best_child(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(self.children.values(), key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits))
+
+
+class TttMcts(TttPlayer):
+    """ UCT search.  Each move runs until `playouts` random playouts are spent or `time_limit`
+    seconds pass, whichever comes first (either may be None, but not both).
+    """
+
+    def __init__(self, *args, playouts=4000, time_limit=None, batch_size=8, exploration=1.4, seed=None, **kwargs):
+        super(TttMcts, self).__init__(*args, **kwargs)
+        if playouts is None and time_limit is None:
+            raise ValueError("TttMcts needs a playout budget, a time limit, or both")
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.rng = np.random.default_rng(seed)
+        self.root = None
+        self._root_game = None
+        self._root_depth = 0
+        self.__name__ = "MCTS Bot: {0}".format(self.unique_name)
+
+    def _reuse_root(self, game):
+        """ Walks the kept tree down the moves played since last turn; None if it can't be reused. """
+        if self.root is None or self._root_game is not game or len(game.history) < self._root_depth:
+            return None
+        node = self.root
+        for move in game.history[self._root_depth:]:
+            node = node.children.get(tuple(move))
+            if node is None:
+                return None
+        node.parent = None
+        return node
+
+    def _iterate(self, game, root):
+        node = root
+        n_pushed = 0
+        try:
+            # selection
+            while not node.untried and node.children and not game.is_finished:
+                node = node.best_child(self.exploration)
+                game.push(node.move)
+                n_pushed += 1
+            # expansion
+            if node.untried and not game.is_finished:
+                move = node.untried.pop(self.rng.integers(len(node.untried)))
+                game.push(move)
+                n_pushed += 1
+                child = MctsNode(move, node, game.legal_moves if not game.is_finished else ())
+                node.children[move] = child
+                node = child
+            # simulation
+            if game.is_finished:
+                wins = 0.5 * self.batch_size if game.winning_player is None else float(self.batch_size)
+            else:
+                wins = rollout_wins(game, self.batch_size, self.rng)
+        finally:
+            for _ in range(n_pushed):
+                game.pop()
+        # backpropagation, flipping point of view each level
+        while node is not None:
+            node.visits += self.batch_size
+            node.wins += wins
+            wins = self.batch_size - wins
+            node = node.parent
+
+    def give_input(self, game):
+        root = self._reuse_root(game)
+        if root is None:
+            root = MctsNode(None, None, game.legal_moves)
+
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        spent = 0
+        while True:
+            self._iterate(game, root)
+            spent += self.batch_size
+            if self.playouts is not None and spent >= self.playouts:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        best = max(root.children.values(), key=lambda child: child.visits)
+        best.parent = None      # the rest of the tree can go
+        self.root = best
+        self._root_game = game
+        self._root_depth = len(game.history) + 1
+        return best.move
@@ -0,0 +1,130 @@
+""" Counters and histograms fed by TttGame observer hooks.
+
+    metrics = GameMetrics()
+    game = TttGame(p1, p2, observers=[metrics])
+    game.play()
+    print(metrics.to_prometheus())
+
+One GameMetrics can watch any number of games; players are told apart by unique_name.
+"""
+import json
+from bisect import bisect_left
+from collections import Counter
+
+from tictac_game import TttObserver
+
+# upper bounds (seconds) of the move-latency histogram buckets; a final +Inf bucket is implied
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1., 2.5, 5., 10.)
+
+
+class LatencyHistogram():
+    __slots__ = ("buckets", "count", "total", "worst")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.
+        self.worst = 0.
+
+    def observe(self, seconds):
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.worst:
+            self.worst = seconds
+
+    def quantile(self, q):
+        """ Upper bound of the bucket holding the q-quantile (inf if it's in the overflow bucket). """
+        if not self.count:
+            return 0.
+        target = q * self.count
+        running = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), self.buckets):
+            running += n
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+def _outcome(game):
+    if game.winning_player is None:
+        return "draw"
+    return "x" if game.current_marker == 1 else "o"
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class GameMetrics(TttObserver):
+    def __init__(self):
+        self.move_latency = {}          # unique_name -> LatencyHistogram
+        self.illegal_moves = Counter()  # unique_name -> retries
+        self.game_lengths = Counter()   # moves played -> games
+        self.outcomes = Counter()       # "x" / "o" / "draw" -> games
+        self.game_seconds = LatencyHistogram()
+
+    def on_move_end(self, game, player, move, seconds):
+        histogram = self.move_latency.get(player.unique_name)
+        if histogram is None:
+            histogram = self.move_latency[player.unique_name] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def on_illegal_move(self, game, player, move):
+        self.illegal_moves[player.unique_name] += 1
+
+    def on_game_end(self, game, seconds):
+        self.game_lengths[len(game.history)] += 1
+        self.outcomes[_outcome(game)] += 1
+        self.game_seconds.observe(seconds)
+
+    def to_dict(self):
+        return {
+            "move_latency": {
+                name: {
+                    "count": hist.count,
+                    "mean": hist.total / hist.count if hist.count else 0.,
+                    "p50": hist.quantile(0.5),
+                    "p99": hist.quantile(0.99),
+                    "max": hist.worst,
+                    } for name, hist in self.move_latency.items()},
+            "illegal_moves": dict(self.illegal_moves),
+            "game_lengths": {str(length): n for length, n in sorted(self.game_lengths.items())},
+            "outcomes": dict(self.outcomes),
+            "games": self.game_seconds.count,
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix="tictac"):
+        """ Prometheus text exposition format. """
+        lines = [
+            "# HELP {0}_move_seconds Time a player took to produce a legal move.".format(prefix),
+            "# TYPE {0}_move_seconds histogram".format(prefix),
+            ]
+        for name, hist in sorted(self.move_latency.items()):
+            running = 0
+            for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), hist.buckets):
+                running += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append("{0}_move_seconds_bucket{{player=\"{1}\",le=\"{2}\"}} {3}".format(prefix, _label(name), le, running))
+            lines.append("{0}_move_seconds_sum{{player=\"{1}\"}} {2!r}".format(prefix, _label(name), hist.total))
+            lines.append("{0}_move_seconds_count{{player=\"{1}\"}} {2}".format(prefix, _label(name), hist.count))
+
+        lines.append("# HELP {0}_illegal_moves_total Moves rejected as illegal.".format(prefix))
+        lines.append("# TYPE {0}_illegal_moves_total counter".format(prefix))
+        for name, n in sorted(self.illegal_moves.items()):
+            lines.append("{0}_illegal_moves_total{{player=\"{1}\"}} {2}".format(prefix, _label(name), n))
+
+        lines.append("# HELP {0}_games_total Finished games by outcome.".format(prefix))
+        lines.append("# TYPE {0}_games_total counter".format(prefix))
+        for outcome, n in sorted(self.outcomes.items()):
+            lines.append("{0}_games_total{{outcome=\"{1}\"}} {2}".format(prefix, outcome, n))
+
+        lines.append("# HELP {0}_game_length_total Finished games by number of moves played.".format(prefix))
+        lines.append("# TYPE {0}_game_length_total counter".format(prefix))
+        for length, n in sorted(self.game_lengths.items()):
+            lines.append("{0}_game_length_total{{moves=\"{1}\"}} {2}".format(prefix, length, n))
+        return "\n".join(lines) + "\n"
@@ -1,12 +1,61 @@
 import numpy as np
 import random
 import re
+from collections import OrderedDict
+
+import tictac_bitboard as ttb
+
+
+def position_key(game):
+    """ Compact, hashable key for the marks on a game's board; positions on different boards never share one. """
+    if hasattr(game, "xbits"):
+        return ttb.state_key(*ttb.game_bits(game))
+    flat_board = game.board.reshape(-1)
+    return game.n_rows, game.n_cols, game.k, np.packbits(np.concatenate([flat_board == 1, flat_board == -1])).tobytes()
+
+
+class DecisionCache():
+    """ LRU map from (position, marker, settings...) to a player's decision, with hit/miss counts.
+    Only worth attaching to players whose decision depends on nothing but those.
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def lookup(self, key, compute, game):
+        """ The cached value for key, or compute(game), stored and returned. """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        value = compute(game)
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
 
 
 class TttPlayer():
-    def __init__(self, player_name):
+    def __init__(self, player_name, verbose=True, decision_cache=None):
         self.unique_name = player_name
-        print("Initializing {0}".format(self.unique_name))
+        self.verbose = verbose
+        self.decision_cache = decision_cache    # optional DecisionCache; see cached_decision
+        if self.verbose:
+            print("Initializing {0}".format(self.unique_name))
 
     def _make_char(self, marker):
         if marker == 1:
@@ -18,19 +67,37 @@ class TttPlayer():
 
     def _print_row(self, board, n_row):
         chars = [self._make_char(m) for m in board[n_row,:]]
-        print(" {0} | {1} | {2} ".format(*chars))
+        print(" " + " | ".join(chars) + " ")
 
     def _print_board(self, game):
         print("\n")
-        self._print_row(game.board, 0)
-        print("-----------")
-        self._print_row(game.board, 1)
-        print("-----------")
-        self._print_row(game.board, 2)
+        n_rows, n_cols = game.board.shape
+        for n_row in range(n_rows):
+            if n_row > 0:
+                print("-" * (4*n_cols - 1))
+            self._print_row(game.board, n_row)
+
+    def examine_board(self, game):
+        pass
 
     def give_input(self, game):
         return (np.nan, np.nan)
 
+    def move_distribution(self, game):
+        """ [(move, probability), ...] that give_input draws from, for players whose choice depends only
+        on the position.  Used for exact analysis (tictac_exact); players that can't say, don't override.
+        """
+        raise NotImplementedError("{0} doesn't expose its move distribution".format(self.unique_name))
+
+    def cached_decision(self, game, compute, *settings):
+        """ compute(game), memoized per (position, current marker, *settings) when a decision_cache is
+        attached.  compute must depend on nothing else, and its result is shared, so keep it immutable.
+        """
+        if self.decision_cache is None:
+            return compute(game)
+        key = (position_key(game), game.current_marker) + settings
+        return self.decision_cache.lookup(key, compute, game)
+
     def return_winner(self, game):
         return game.current_winner
 
@@ -39,11 +106,12 @@ class TttPlayer():
 class TttHuman(TttPlayer):
     def __init__(self, *args, **kwargs):
         super(self.__class__, self).__init__(*args, **kwargs)  # inherit TttPlayer's "__init__"
-        self.re_player_input = re.compile(r"^([0-2]{1})[, ]+([0-2]{1})$")
+        self.re_player_input = re.compile(r"^([0-9]+)[, ]+([0-9]+)$")
         self.__name__ = "Human Player: {0}".format(self.unique_name)
 
     def give_input(self, game):
         self._print_board(game)
+        n_rows, n_cols = game.board.shape
         run = True
         while run:
             if game.current_player == game.p1:
@@ -55,8 +123,8 @@ class TttHuman(TttPlayer):
 
             player_input = input("Choose x,y coordinates to place icon for {0}: ".format(icon))
             player_choice = self.re_player_input.search(player_input)
-            if not player_choice:
-                print("Please try again; you must choose x,y coordinates from 0-2")
+            if not player_choice or int(player_choice[1]) >= n_rows or int(player_choice[2]) >= n_cols:
+                print("Please try again; you must choose x,y coordinates from 0-{0}, 0-{1}".format(n_rows - 1, n_cols - 1))
             else:
                 # group 0 is the entire match, g1/g2 are x/y
                 x = int(player_choice[1])
@@ -67,103 +135,71 @@ class TttHuman(TttPlayer):
 
 
 class TttHeuristic(TttPlayer):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, rng=None, **kwargs):
         super(self.__class__, self).__init__(*args, **kwargs)  # inherit TttPlayer's "__init__"
         self.INTELLIGENCE = 1
+        self.rng = random if rng is None else rng    # anything with .choice, e.g. random.Random(seed)
+        self.policy = None     # optional tictac_policy.PolicyTable
         self.__name__ = "Heuristic Bot (Intelligence {0}): {1}".format(self.INTELLIGENCE, self.unique_name)
-        print("Starting", self.__name__)
-
-    def _check_diag(self, board, marker, direction):
-        win_row = np.nan
-        win_col = np.nan
-        if direction == "main":
-            board_diag = board[(0, 1, 2), (0, 1, 2)]
-        elif direction == "orth":
-            board_diag = board[(0, 1, 2), (2, 1, 0)]
-        else:
-            raise ValueError("What kind of diagonal is this?")
-
-        if (np.isnan(board_diag).sum() == 1) & ((board_diag == marker).sum() == 2):
-            win_row = np.where(np.isnan(board_diag))[0][0]  # we know exactly 1 of these is a nan
-            if direction == "main":
-                win_col = win_row
-            elif direction == "orth":
-                win_col = 2 - win_row
-        return win_row, win_col
-
-    def _check_row(self, board, marker, idx_row):
-        win_row = np.nan
-        win_col = np.nan
-        check = board[idx_row, :]
-        if (np.isnan(check).sum() == 1) & ((check == marker).sum() == 2):
-            win_row = idx_row
-            win_col = np.where(np.isnan(check))[0][0]
-        return win_row, win_col
-
-    def _check_col(self, board, marker, idx_col):
-        win_row = np.nan
-        win_col = np.nan
-        check = board[:, idx_col]
-        if (np.isnan(check).sum() == 1) & ((check == marker).sum() == 2):
-            win_col = idx_col
-            win_row = np.where(np.isnan(check))[0][0]
-        return win_row, win_col
-
-    def _find_winning_plays(self, board, marker):
-        winning_plays = []
-        for dir in ["main", "orth"]:
-            (wr, wc) = self._check_diag(board, marker, dir)
-            if not np.isnan(wr):
-                winning_plays.append((wr,wc))
-        for idx_row in (0,1,2):
-            (wr, wc) = self._check_row(board, marker, idx_row)
-            if not np.isnan(wr):
-                winning_plays.append((wr,wc))
-        for idx_col in (0,1,2):
-            (wr, wc) = self._check_col(board, marker, idx_row)
-            if not np.isnan(wr):
-                winning_plays.append((wr,wc))
-        return winning_plays
-
-    def _check_for_possible_wins(self, board, marker):
-        winning_plays = self._find_winning_plays(board, marker)
+        if self.verbose:
+            print("Starting", self.__name__)
+
+    def _check_for_possible_wins(self, game, marker):
+        winning_plays = game.completing_moves(marker)
         if len(winning_plays) > 0:
             return winning_plays.pop()
         # if no potential wins
         return np.nan, np.nan
 
-    def _check_forks(self, game, marker, legal_moves):
-        board = game.board
-        forks = []
-        for move in legal_moves:
-            possible_board = board.copy()
-            possible_board[move] = marker
-            winning_plays = self._find_winning_plays(possible_board, marker)
-            if len(winning_plays) > 1:
-                forks.append(move)
-        return forks
+    def _check_forks(self, game, marker):
+        return game.fork_moves(marker)
 
-    def give_input(self, game):
-        """ HeuristicBot can be set smarter or stoopider using INTELLIGENCE parameter
-        At INTELLIGENCE == 0; returns a random legal move
-        At INTELLIGENCE == 1; returns a win if possible, else a random legal move
-        At INTELLIGENCE == 2; returns a win if possible, else a block, else a random legal move
-        At INTELLIGENCE == 3; returns a win, then block, then fork, or else a random legal move
-        """
+    def _forced_move(self, game):
+        """ The win / block / fork this INTELLIGENCE insists on, or None. """
         if self.INTELLIGENCE >= 1:
         # return win if possible
-            win_row, win_col = self._check_for_possible_wins(game.board, game.current_marker)
+            win_row, win_col = self._check_for_possible_wins(game, game.current_marker)
             if (win_row >= 0) and (win_col >= 0):
-                return win_row, win_col
+                return (win_row, win_col)
         if self.INTELLIGENCE >= 2:
         # return block if possible
-            block_row, block_col = self._check_for_possible_wins(game.board, -1*game.current_marker)
+            block_row, block_col = self._check_for_possible_wins(game, -1*game.current_marker)
             if (block_row >= 0) and (block_col >= 0):
-                return block_row, block_col
+                return (block_row, block_col)
         if self.INTELLIGENCE >= 3:
         # return fork if possible
-            forks = self._check_forks(game, game.current_marker, game.legal_moves)
+            forks = self._check_forks(game, game.current_marker)
             if len(forks) > 0:
                 return forks.pop()   # no discrimination between forks
-        # else return random legal move
-        return random.choice(game.legal_moves)
\ No newline at end of file
+        return None
+
+    def candidate_moves(self, game):
+        """ The moves give_input picks from, before the random draw.
+        A single move when a win / block / fork applies, otherwise every legal move.
+        Only the forced move goes through the decision cache: the legal-move order differs between
+        games reaching the same position, and the random draw indexes into it.
+        """
+        forced = self.cached_decision(game, self._forced_move, self.INTELLIGENCE)
+        if forced is None:
+            # else any legal move
+            return game.legal_moves
+        return [forced]
+
+    def move_distribution(self, game):
+        if self.policy is not None:
+            moves = self.policy.candidate_moves(game, self.INTELLIGENCE)
+        else:
+            moves = self.candidate_moves(game)
+        return [(move, 1. / len(moves)) for move in moves]
+
+    def give_input(self, game):
+        """ HeuristicBot can be set smarter or stoopider using INTELLIGENCE parameter
+        At INTELLIGENCE == 0; returns a random legal move
+        At INTELLIGENCE == 1; returns a win if possible, else a random legal move
+        At INTELLIGENCE == 2; returns a win if possible, else a block, else a random legal move
+        At INTELLIGENCE == 3; returns a win, then block, then fork, or else a random legal move
+        With a policy table attached, the same choice is read from the table instead.
+        """
+        if self.policy is not None:
+            return self.policy.choose(game, self.INTELLIGENCE, self.rng)
+        return self.rng.choice(self.candidate_moves(game))
@@ -0,0 +1,91 @@
+""" Precomputed TttHeuristic policy, stored as a memory-mapped table.
+
+Positions are indexed by their base-3 code (empty=0, X=1, O=2 per cell, cell 3*row+col is the
+3**cell digit), so the table has 3**9 rows.  Row `idx`, column `level` holds the 9-bit mask of
+moves TttHeuristic.candidate_moves returns at that INTELLIGENCE level; unreachable and finished
+positions hold 0.  The file is a plain .npy, so np.load(mmap_mode="r") maps it without reading,
+and every process that loads it shares the same pages.
+
+Build it once with `python tictac_policy.py [path]`; rebuild whenever TttHeuristic's rules change
+(POLICY_VERSION is part of the default file name for that reason).
+"""
+import os
+import random
+import sys
+
+import numpy as np
+
+import tictac_bitboard as ttb
+from tictac_game import TttBitGame
+from tictac_players import TttHeuristic
+
+POLICY_VERSION = 2
+N_LEVELS = 4
+N_POSITIONS = 3**9
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictac_policy_v{0}.npy".format(POLICY_VERSION))
+
+# TERNARY[bits] is the base-3 value of a 9-bit mask with a 1 digit wherever a bit is set
+TERNARY = tuple(sum(3**idx for idx in range(9) if (bits >> idx) & 1) for bits in range(ttb.FULL_MASK + 1))
+
+# MASK_MOVES[mask] is the (row, col) list of the cells set in mask
+MASK_MOVES = tuple([ttb.BIT_CELLS[idx] for idx in range(9) if (mask >> idx) & 1] for mask in range(ttb.FULL_MASK + 1))
+
+
+def position_index(xbits, obits):
+    return TERNARY[xbits] + 2*TERNARY[obits]
+
+
+def _visit(game, bot, table, seen):
+    idx = position_index(game.xbits, game.obits)
+    if idx in seen:
+        return
+    seen.add(idx)
+    if game.is_finished:
+        return
+
+    for level in range(N_LEVELS):
+        bot.INTELLIGENCE = level
+        mask = 0
+        for row, col in bot.candidate_moves(game):
+            mask |= ttb.CELL_BITS[int(row)][int(col)]
+        table[idx, level] = mask
+
+    for move in list(game.legal_moves):
+        game.push(move)
+        _visit(game, bot, table, seen)
+        game.pop()
+
+
+def build_table():
+    """ Runs TttHeuristic.candidate_moves on every reachable position, at every level. """
+    table = np.zeros((N_POSITIONS, N_LEVELS), dtype=np.uint16)
+    bot = TttHeuristic("policy_builder", verbose=False)
+    _visit(TttBitGame(bot, bot, headless=True), bot, table, set())
+    return table
+
+
+def save_table(path=DEFAULT_PATH):
+    table = build_table()
+    np.save(path, table)
+    return path
+
+
+class PolicyTable():
+    """ Read-only view of a saved table.  Attach to a bot with `bot.policy = PolicyTable()`. """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.masks = np.load(path, mmap_mode="r")
+        if self.masks.shape != (N_POSITIONS, N_LEVELS):
+            raise ValueError("{0} is not a policy table".format(path))
+
+    def candidate_moves(self, game, level):
+        xbits, obits = ttb.game_bits(game)
+        return MASK_MOVES[self.masks[position_index(xbits, obits), level]]
+
+    def choose(self, game, level, rng=random):
+        return rng.choice(self.candidate_moves(game, level))
+
+
+if __name__ == "__main__":
+    print("Wrote", save_table(*sys.argv[1:2]))
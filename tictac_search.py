@@ -0,0 +1,267 @@
+""" Alpha-beta search player for m,n,k boards too big to solve outright.
+
+Negamax with alpha-beta pruning, searched one ply deeper at a time until the time limit; the
+move kept is the best one from the deepest search that finished (or from the part of an
+unfinished search that got through the previous best move).  Search runs on the live game
+through TttGame.push/pop.
+
+At each node, threats come first: a completing move wins on the spot, an opponent's completing
+move must be blocked, and fork moves for either side are tried next -- the same completing_moves
+and fork_moves tests TttHeuristic plays by.  Remaining moves are limited to boxes within two of a
+marker and ordered by how much they do for open lines.  Positions are cached in a fixed-size
+Zobrist-hashed transposition table.
+"""
+import random
+import time
+
+import numpy as np
+
+from tictac_game import line_incidence
+from tictac_players import TttPlayer
+
+WIN = 1000000
+WON = WIN - 1000        # any score beyond this is a forced win (or, negated, a loss)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class _Timeout(Exception):
+    pass
+
+
+class TranspositionTable():
+    """ 2**size_log2 slots, each holding one (key, depth, score, bound, move, generation) entry.
+
+    A slot goes to the new entry unless it holds a deeper search from the current generation (one
+    generation per give_input call), so old entries are always replaced and recent deep ones kept.
+    """
+    def __init__(self, size_log2=18):
+        self.mask = (1 << size_log2) - 1
+        self.slots = [None] * (1 << size_log2)
+        self.generation = 0
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+
+    def probe(self, key):
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        idx = key & self.mask
+        entry = self.slots[idx]
+        if entry is None or entry[5] != self.generation or entry[1] <= depth or entry[0] == key:
+            self.slots[idx] = (key, depth, score, bound, move, self.generation)
+
+
+class TttSearch(TttPlayer):
+    def __init__(self, *args, time_limit=1.0, max_depth=None, tt_size_log2=18, seed=0, **kwargs):
+        super(TttSearch, self).__init__(*args, **kwargs)
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = TranspositionTable(tt_size_log2)
+        self._zobrist_rng = random.Random(seed)
+        self._zobrist = {}      # (n_rows, n_cols, k) -> (2, n_boxes) random 64-bit keys
+        self._geometry = None
+        self.depth_reached = 0
+        self.nodes = 0
+        self.score = 0
+        self.__name__ = "Search Bot: {0}".format(self.unique_name)
+
+    def _setup(self, game):
+        geometry = (game.n_rows, game.n_cols, game.k)
+        if geometry != self._geometry:
+            # scores depend on k as well as the boxes, so nothing carries over to another board
+            self.table.clear()
+            self._geometry = geometry
+        if geometry not in self._zobrist:
+            self._zobrist[geometry] = [[self._zobrist_rng.getrandbits(64) for box in range(game.n_rows * game.n_cols)] for side in range(2)]
+        self._keys = self._zobrist[geometry]
+        self._incidence = line_incidence(game.n_rows, game.n_cols, game.k)
+        # worth of a line to its owner by boxes held, when the opponent holds none of it
+        self._weights = np.array([0] + [4 ** count for count in range(game.k)], dtype=np.int64)
+        self._hash = 0
+        for marker, side in ((1, 0), (-1, 1)):
+            for box in np.flatnonzero(game.board.reshape(-1) == marker):
+                self._hash ^= self._keys[side][box]
+
+    def _push(self, game, move):
+        self._hash ^= self._keys[0 if game.current_marker == 1 else 1][move[0] * game.n_cols + move[1]]
+        game.push(move)
+
+    def _pop(self, game):
+        row, col = game.pop()
+        self._hash ^= self._keys[0 if game.current_marker == 1 else 1][row * game.n_cols + col]
+
+    def _evaluate(self, game):
+        """ Open-line worth for the side to move, minus the same for its opponent. """
+        own, opp, empty = game.line_tallies(game.current_marker)
+        return int(self._weights[own][opp == 0].sum() - self._weights[opp][own == 0].sum())
+
+    def _ordered_moves(self, game, tt_move):
+        """ Moves to search, best guesses first; forced to the blocks when the opponent threatens. """
+        me = game.current_marker
+        wins = game.completing_moves(me)
+        if wins:
+            return wins[:1]
+        blocks = list(dict.fromkeys(game.completing_moves(-me)))
+        if blocks:
+            return blocks
+
+        flat_board = game.board.reshape(-1)
+        empty = np.isnan(flat_board)
+        occupied = (~empty).reshape(game.n_rows, game.n_cols)
+        if occupied.any():
+            near = np.zeros_like(occupied)
+            for drow in range(-2, 3):
+                for dcol in range(-2, 3):
+                    shifted = np.roll(np.roll(occupied, drow, axis=0), dcol, axis=1)
+                    # undo the wrap-around that np.roll brings in from the far edge
+                    if drow > 0:
+                        shifted[:drow] = False
+                    elif drow < 0:
+                        shifted[drow:] = False
+                    if dcol > 0:
+                        shifted[:, :dcol] = False
+                    elif dcol < 0:
+                        shifted[:, dcol:] = False
+                    near |= shifted
+            candidates = empty & near.reshape(-1)
+        else:
+            candidates = empty
+
+        own, opp, _ = game.line_tallies(me)
+        line_worth = self._weights[np.minimum(own + 1, game.k)] * (opp == 0) + self._weights[np.minimum(opp + 1, game.k)] * (own == 0)
+        box_worth = self._incidence @ line_worth
+        boxes = np.flatnonzero(candidates)
+        boxes = boxes[np.argsort(-box_worth[boxes], kind="stable")]
+
+        moves = []
+        if tt_move is not None:
+            moves.append(tt_move)
+        moves += game.fork_moves(me) + game.fork_moves(-me)
+        moves += [divmod(int(box), game.n_cols) for box in boxes]
+        return list(dict.fromkeys(move for move in moves if move in game.legal_moves))
+
+    def _negamax(self, game, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes & 63 == 0 and time.perf_counter() > self._deadline:
+            raise _Timeout()
+
+        if game.completing_moves(game.current_marker):
+            return WIN - ply - 1
+        if depth == 0:
+            return self._evaluate(game)
+
+        alpha_orig = alpha
+        entry = self.table.probe(self._hash)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry[4]
+            if entry[1] >= depth:
+                score = _from_table(entry[2], ply)
+                if entry[3] == EXACT:
+                    return score
+                elif entry[3] == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        best_score = -WIN
+        best_move = None
+        for move in self._ordered_moves(game, tt_move):
+            self._push(game, move)
+            if game.is_finished:
+                score = 0 if game.winning_player is None else WIN - ply - 1
+            else:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            self._pop(game)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= alpha_orig:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(self._hash, depth, _to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _search_root(self, game, depth, first):
+        """ One full-width search at `depth`; `first` (the previous best) is searched first. """
+        moves = self._ordered_moves(game, first)
+        best_score = -WIN - 1
+        best_move = None
+        alpha = -WIN - 1
+        try:
+            for move in moves:
+                self._push(game, move)
+                if game.is_finished:
+                    score = 0 if game.winning_player is None else WIN
+                else:
+                    score = -self._negamax(game, depth - 1, -WIN - 1, -alpha, 1)
+                self._pop(game)
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+                alpha = max(alpha, score)
+        except _Timeout:
+            # the previous best is searched first, so a partial result is still a fair comparison
+            while len(game.history) > self._root_ply:
+                self._pop(game)
+            raise _Timeout(best_move, best_score)
+        self.table.store(self._hash, depth, best_score, EXACT, best_move)
+        return best_move, best_score
+
+    def give_input(self, game):
+        self._setup(game)
+        self.table.generation += 1
+        self.nodes = 0
+        self._root_ply = len(game.history)
+        self._deadline = float("inf") if self.time_limit is None else time.perf_counter() + self.time_limit
+
+        max_depth = len(game.legal_moves)
+        if self.max_depth is not None:
+            max_depth = min(max_depth, self.max_depth)
+        best_move = None
+        self.score = 0
+        self.depth_reached = 0
+        for depth in range(1, max_depth + 1):
+            try:
+                best_move, self.score = self._search_root(game, depth, best_move)
+            except _Timeout as timeout:
+                partial_move, partial_score = timeout.args
+                if partial_move is not None and (partial_move == best_move or partial_score > self.score):
+                    best_move, self.score = partial_move, partial_score
+                break
+            self.depth_reached = depth
+            if abs(self.score) >= WON:
+                break       # forced result; deeper search can't change it
+        if best_move is None:
+            best_move = self._ordered_moves(game, None)[0]
+        return best_move
+
+
+def _to_table(score, ply):
+    """ Wins are stored as distance from the stored node, not from the root. """
+    if score >= WON:
+        return score + ply
+    if score <= -WON:
+        return score - ply
+    return score
+
+
+def _from_table(score, ply):
+    if score >= WON:
+        return score - ply
+    if score <= -WON:
+        return score + ply
+    return score
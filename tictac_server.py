@@ -0,0 +1,218 @@
+""" Asyncio server hosting many concurrent games between remote humans and bots.
+
+Line protocol, one message per line:
+    server -> client
+        WELCOME <X|O> <n_rows> <n_cols> <k>
+        YOUR_MOVE                   your turn; answer with "row,col" (same grammar as TttHuman)
+        MOVE <row> <col>            the bot's move
+        ILLEGAL <reason>            move rejected; another YOUR_MOVE follows
+        RESULT <WIN|LOSS|DRAW>      game over; the server closes the connection
+    client -> server
+        <row>,<col>  or  <row> <col>
+        QUIT
+
+Bot moves run inline on the event loop by default (cheap bots), or in an executor with
+offload=True (search bots).  The server keeps a bounded sample of per-move latencies, measured
+from receiving the human's move to sending the bot's reply.  run_load() is a matching localhost
+client that plays random legal moves over many concurrent connections.
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+import tictac_game as ttg
+from tictac_players import TttHeuristic, TttPlayer
+
+RE_MOVE = re.compile(r"^([0-9]+)[, ]+([0-9]+)$")     # as TttHuman.re_player_input
+
+
+class TttRemote(TttPlayer):
+    """ Stand-in for the human on the other end of a connection; the server feeds its moves in. """
+
+    def give_input(self, game):
+        raise RuntimeError("Remote players' moves arrive over the socket")
+
+
+def default_bot():
+    bot = TttHeuristic("server_bot", verbose=False)
+    bot.INTELLIGENCE = 3
+    return bot
+
+
+class TttServer():
+    def __init__(self, bot_factory=default_bot, human_marker=1, n_rows=3, n_cols=3, k=3,
+                 offload=False, executor=None, latency_samples=100000):
+        self.bot_factory = bot_factory
+        self.human_marker = human_marker
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.k = k
+        self.offload = offload
+        self.executor = executor
+        self.latencies = deque(maxlen=latency_samples)   # seconds, most recent bot replies
+        self.n_active = 0
+        self.n_played = 0
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """ Listens on TCP host:port, or on a Unix socket when path is given. """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._session, path=path)
+        else:
+            self._server = await asyncio.start_server(self._session, host, port, backlog=4096)
+        return self._server
+
+    async def serve_forever(self, **kwargs):
+        server = await self.start(**kwargs)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+    def latency_percentiles(self, percentiles=(50, 90, 99)):
+        if not self.latencies:
+            return {}
+        values = np.percentile(np.fromiter(self.latencies, dtype=float), percentiles)
+        return {"p{0}".format(pct): float(val) for pct, val in zip(percentiles, values)}
+
+    async def _bot_move(self, bot, game):
+        if self.offload:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, bot.give_input, game)
+        return bot.give_input(game)
+
+    async def _session(self, reader, writer):
+        self.n_active += 1
+        human = TttRemote("remote", verbose=False)
+        bot = self.bot_factory()
+        players = (human, bot) if self.human_marker == 1 else (bot, human)
+        game = ttg.TttGame(*players, headless=True, n_rows=self.n_rows, n_cols=self.n_cols, k=self.k)
+        try:
+            writer.write("WELCOME {0} {1} {2} {3}\n".format("X" if self.human_marker == 1 else "O", self.n_rows, self.n_cols, self.k).encode())
+            received_at = None
+            while not game.is_finished:
+                if game.current_player is bot:
+                    row, col = await self._bot_move(bot, game)
+                    game.push((int(row), int(col)))
+                    writer.write("MOVE {0} {1}\n".format(int(row), int(col)).encode())
+                    if received_at is not None:
+                        self.latencies.append(time.perf_counter() - received_at)
+                    continue
+
+                writer.write(b"YOUR_MOVE\n")
+                await writer.drain()
+                line = await reader.readline()
+                received_at = time.perf_counter()
+                if not line or line.strip().upper() == b"QUIT":
+                    return
+                choice = RE_MOVE.search(line.decode(errors="replace").strip())
+                if not choice:
+                    writer.write(b"ILLEGAL expected row,col\n")
+                    continue
+                try:
+                    game.push((int(choice[1]), int(choice[2])))
+                except ttg.IllegalMoveError:
+                    writer.write(b"ILLEGAL square taken or off the board\n")
+
+            if game.winning_player is None:
+                result = "DRAW"
+            elif game.winning_player is human:
+                result = "WIN"
+            else:
+                result = "LOSS"
+            writer.write("RESULT {0}\n".format(result).encode())
+            await writer.drain()
+            self.n_played += 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.n_active -= 1
+            writer.close()
+
+
+async def _load_client(host, port, path, rng, round_trips):
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, marker, n_rows, n_cols, k = (await reader.readline()).decode().split()
+        open_boxes = {(row, col) for row in range(int(n_rows)) for col in range(int(n_cols))}
+        sent_at = None
+        while True:
+            words = (await reader.readline()).decode().split()
+            if not words:
+                return None
+            if sent_at is not None and words[0] in ("YOUR_MOVE", "RESULT"):
+                round_trips.append(time.perf_counter() - sent_at)
+                sent_at = None
+            if words[0] == "MOVE":
+                open_boxes.discard((int(words[1]), int(words[2])))
+            elif words[0] == "YOUR_MOVE":
+                move = rng.choice(sorted(open_boxes))
+                open_boxes.discard(move)
+                sent_at = time.perf_counter()
+                writer.write("{0},{1}\n".format(*move).encode())
+                await writer.drain()
+            elif words[0] == "RESULT":
+                return words[1]
+            else:
+                return None
+    finally:
+        writer.close()
+
+
+async def run_load(n_games=1000, concurrency=100, host="127.0.0.1", port=8765, path=None, seed=None):
+    """ Plays n_games against a running server, at most `concurrency` connections at a time.
+
+    Returns the result counts and client-side round-trip percentiles (seconds), from sending a move
+    to hearing the server's next prompt.
+    """
+    rng = random.Random(seed)
+    round_trips = []
+    results = {"WIN": 0, "LOSS": 0, "DRAW": 0, None: 0}
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one_game():
+        async with limit:
+            results[await _load_client(host, port, path, rng, round_trips)] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_game() for _ in range(n_games)))
+    elapsed = time.perf_counter() - started
+
+    report = {"games": n_games, "seconds": elapsed, "results": {str(key): val for key, val in results.items()}}
+    if round_trips:
+        values = np.percentile(round_trips, (50, 90, 99))
+        report.update(p50=float(values[0]), p90=float(values[1]), p99=float(values[2]))
+    return report
+
+
+async def _serve_and_load(n_games, concurrency, seed):
+    server = TttServer()
+    await server.start(port=0)
+    port = server._server.sockets[0].getsockname()[1]
+    report = await run_load(n_games, concurrency, port=port, seed=seed)
+    report["server"] = server.latency_percentiles()
+    server.close()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tic-tac-toe session server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="serve on this Unix socket path instead of TCP")
+    parser.add_argument("--selftest", type=int, default=0, metavar="N", help="serve and load-test N games on localhost, then exit")
+    parser.add_argument("--concurrency", type=int, default=1000)
+    args = parser.parse_args()
+    if args.selftest:
+        print(asyncio.run(_serve_and_load(args.selftest, args.concurrency, seed=0)))
+    else:
+        asyncio.run(TttServer().serve_forever(host=args.host, port=args.port, path=args.unix))
@@ -0,0 +1,97 @@
+""" Exact solution of 3x3 tic-tac-toe, and a player that plays from it.
+
+Every position where a move is due is solved once by negamax and stored in a transposition
+table keyed by its canonical (symmetry-folded) bitboard.  Each entry holds the score for the
+side to move and the mask of optimal moves, expressed in the canonical frame.
+Scores are positive for a win, zero for a draw, negative for a loss; faster wins score higher.
+"""
+import random
+
+import tictac_bitboard as ttb
+from tictac_players import TttPlayer
+
+_TABLE = None
+
+
+def _popcount(bits):
+    return bin(bits).count("1")
+
+
+def _negamax(xbits, obits, table):
+    key, sym = ttb.canonical(xbits, obits)
+    if key in table:
+        return table[key][0]
+
+    x_to_move = _popcount(xbits) == _popcount(obits)
+    mine = xbits if x_to_move else obits
+    taken = xbits | obits
+    n_empty = 9 - _popcount(taken)
+
+    best_score = None
+    best_mask = 0
+    for idx in range(9):
+        bit = 1 << idx
+        if taken & bit:
+            continue
+        if ttb.WIN_TABLE[mine | bit]:
+            score = n_empty     # win now; fewer moves played scores higher
+        elif n_empty == 1:
+            score = 0           # last box, no winner
+        elif x_to_move:
+            score = -_negamax(xbits | bit, obits, table)
+        else:
+            score = -_negamax(xbits, obits | bit, table)
+
+        if best_score is None or score > best_score:
+            best_score = score
+            best_mask = bit
+        elif score == best_score:
+            best_mask |= bit
+
+    table[key] = (best_score, ttb.SYMMETRY_BITS[sym][best_mask])
+    return best_score
+
+
+def solve():
+    """ Builds the full transposition table, {canonical key: (score, best-move mask)}. """
+    table = {}
+    _negamax(0, 0, table)
+    return table
+
+
+def get_table():
+    """ The solved table, built on first use and shared afterwards. """
+    global _TABLE
+    if _TABLE is None:
+        _TABLE = solve()
+    return _TABLE
+
+
+def lookup(xbits, obits):
+    """ Score for the side to move, and the mask of optimal moves in the position's own frame. """
+    key, sym = ttb.canonical(xbits, obits)
+    score, canon_mask = get_table()[key]
+    return score, ttb.SYMMETRY_BITS[ttb.INVERSE_SYMMETRY[sym]][canon_mask]
+
+
+class TttPerfect(TttPlayer):
+    """ Never loses.  Chooses at random among equally good moves, so games still vary. """
+
+    def __init__(self, *args, rng=None, **kwargs):
+        super(TttPerfect, self).__init__(*args, **kwargs)
+        self.rng = random if rng is None else rng
+        self.table = get_table()
+        self.__name__ = "Perfect Bot: {0}".format(self.unique_name)
+
+    def _best_moves(self, game):
+        xbits, obits = ttb.game_bits(game)
+        key, sym = ttb.canonical(xbits, obits)
+        mask = ttb.SYMMETRY_BITS[ttb.INVERSE_SYMMETRY[sym]][self.table[key][1]]
+        return [ttb.BIT_CELLS[idx] for idx in range(9) if (mask >> idx) & 1]
+
+    def move_distribution(self, game):
+        moves = self._best_moves(game)
+        return [(move, 1. / len(moves)) for move in moves]
+
+    def give_input(self, game):
+        return self.rng.choice(self._best_moves(game))
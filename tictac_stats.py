@@ -0,0 +1,113 @@
+""" Streaming aggregates over finished games, in memory independent of the number of games.
+
+Each finished game is reduced to a GameRecord (outcome and move order) and folded into a
+GameStats: outcome counts, a game-length histogram, outcomes by X's opening box, and per-box
+occupancy of X and O on the final boards.  Nothing refers back to the game, so it can be freed
+straight away.
+
+    stats = GameStats()
+    for idx in range(n_games):
+        game = TttBitGame(b1, b2)
+        game.play()
+        stats.add_game(game)
+
+GameStats is also a TttObserver (TttGame(..., observers=[stats])), and stats from separate
+workers combine with merge().
+"""
+import numpy as np
+
+from tictac_game import TttObserver
+
+OUTCOMES = ("x", "o", "draw")
+
+
+class GameRecord():
+    """ What GameStats keeps of a finished game: outcome (1 X won, -1 O won, 0 draw) and the flat
+    box index (row*n_cols + col) of every move in order.
+    """
+    __slots__ = ("outcome", "moves")
+
+    def __init__(self, outcome, moves):
+        self.outcome = outcome
+        self.moves = moves
+
+    @classmethod
+    def from_game(cls, game):
+        if game.winning_player is None:
+            outcome = 0
+        else:
+            outcome = game.current_marker
+        return cls(outcome, tuple(row*game.n_cols + col for row, col in game.history))
+
+    @property
+    def n_moves(self):
+        return len(self.moves)
+
+    @property
+    def first_move(self):
+        return self.moves[0] if self.moves else None
+
+
+def _outcome_column(outcome):
+    return 0 if outcome == 1 else 1 if outcome == -1 else 2
+
+
+class GameStats(TttObserver):
+    def __init__(self, n_rows=3, n_cols=3):
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        n_boxes = n_rows * n_cols
+        self.outcomes = np.zeros(3, dtype=np.int64)                   # x, o, draw
+        self.lengths = np.zeros(n_boxes + 1, dtype=np.int64)          # moves played -> games
+        self.openings = np.zeros((n_boxes, 3), dtype=np.int64)        # X's first box -> x, o, draw
+        self.occupancy = np.zeros((2, n_boxes), dtype=np.int64)       # final boards; row 0 X, row 1 O
+
+    @property
+    def n_games(self):
+        return int(self.outcomes.sum())
+
+    def add(self, record):
+        column = _outcome_column(record.outcome)
+        self.outcomes[column] += 1
+        self.lengths[len(record.moves)] += 1
+        if record.moves:
+            self.openings[record.moves[0], column] += 1
+            self.occupancy[0, list(record.moves[0::2])] += 1
+            self.occupancy[1, list(record.moves[1::2])] += 1
+
+    def add_game(self, game):
+        if (game.n_rows, game.n_cols) != (self.n_rows, self.n_cols):
+            raise ValueError("{0}x{1} game in {2}x{3} stats".format(game.n_rows, game.n_cols, self.n_rows, self.n_cols))
+        self.add(GameRecord.from_game(game))
+
+    def on_game_end(self, game, seconds):
+        self.add_game(game)
+
+    def merge(self, other):
+        self.outcomes += other.outcomes
+        self.lengths += other.lengths
+        self.openings += other.openings
+        self.occupancy += other.occupancy
+        return self
+
+    def first_move_rates(self):
+        """ (n_rows, n_cols, 3) x / o / draw rates by X's opening box; NaN where it never opened. """
+        played = self.openings.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = self.openings / played
+        return rates.reshape(self.n_rows, self.n_cols, 3)
+
+    def heatmap(self, marker=1):
+        """ Fraction of final boards with `marker` (1 for X, -1 for O) in each box, as (n_rows, n_cols). """
+        counts = self.occupancy[0 if marker == 1 else 1]
+        return (counts / max(self.n_games, 1)).reshape(self.n_rows, self.n_cols)
+
+    def to_dict(self):
+        return {
+            "games": self.n_games,
+            "outcomes": dict(zip(OUTCOMES, self.outcomes.tolist())),
+            "game_lengths": {str(length): n for length, n in enumerate(self.lengths.tolist()) if n},
+            "openings": {"{0},{1}".format(*divmod(box, self.n_cols)): dict(zip(OUTCOMES, row))
+                         for box, row in enumerate(self.openings.tolist()) if sum(row)},
+            "occupancy": {"x": self.occupancy[0].tolist(), "o": self.occupancy[1].tolist()},
+            }
@@ -0,0 +1,220 @@
+""" Round-robin of TttHeuristic intelligence levels, split across a process pool.
+
+The work is cut into (pairing, chunk) units.  With the object engine every game has its own
+random stream, seeded from (seed, int_x, int_o, game index), so the result depends only on the
+seed -- not on the chunk size, the number of workers or the order units finish in -- and any game
+can be replayed from that tuple alone (replay_game).  The batch engine seeds a stream per unit
+from (seed, int_x, int_o, chunk) instead, so its results do depend on the chunk size.
+
+run_adaptive() plays the same units a round at a time and stops each pairing once its outcome
+rates are known to within a target confidence-interval width, so decided pairings cost a chunk
+or two and close ones get the games.
+"""
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+import tictac_batch as ttbatch
+import tictac_game as ttg
+from tictac_players import DecisionCache, TttHeuristic
+from tictac_stats import GameStats
+
+DEFAULT_CHUNK = 250
+
+
+def unit_seed(seed, int_x, int_o, chunk):
+    """ An independent seed for one work unit of the batch engine. """
+    state = np.random.SeedSequence(seed, spawn_key=(int_x, int_o, chunk)).generate_state(2, dtype=np.uint64)
+    return int(state[0]) ^ (int(state[1]) << 64)
+
+
+def game_seed(seed, int_x, int_o, game_idx):
+    """ The 64-bit seed of game number game_idx of the (int_x, int_o) pairing; fits a GameLog seed column. """
+    return int(np.random.SeedSequence(seed, spawn_key=(int_x, int_o, int(game_idx))).generate_state(1, dtype=np.uint64)[0])
+
+
+def heuristic_bots(int_x, int_o, policy_path=None):
+    """ The two bots every tournament game is played between. """
+    # the bots share one random stream and one decision cache; neither changes which moves are played
+    cache = DecisionCache()
+    bot_x = TttHeuristic("bot_x", rng=random.Random(), verbose=False, decision_cache=cache)
+    bot_o = TttHeuristic("bot_o", rng=bot_x.rng, verbose=False, decision_cache=cache)
+    bot_x.INTELLIGENCE = int_x
+    bot_o.INTELLIGENCE = int_o
+    if policy_path is not None:
+        from tictac_policy import PolicyTable
+        bot_x.policy = bot_o.policy = PolicyTable(policy_path)
+    return bot_x, bot_o
+
+
+def _play_game(bot_x, bot_o, rng_seed):
+    bot_x.rng.seed(rng_seed)
+    game = ttg.TttBitGame(bot_x, bot_o, headless=True)
+    game.play()
+    return game
+
+
+def game_outcomes(int_x, int_o, n_games, seed=0, start=0, policy_path=None):
+    """ Outcomes (1 X won, -1 O won, 0 draw) of games start .. start + n_games - 1 of a pairing.
+
+    Together with the arguments, the outcome array is all a run needs to keep: any game in it can
+    be played again with replay_game.
+    """
+    bot_x, bot_o = heuristic_bots(int_x, int_o, policy_path)
+    outcome = np.zeros(n_games, dtype=np.int8)
+    for idx in range(n_games):
+        game = _play_game(bot_x, bot_o, game_seed(seed, int_x, int_o, start + idx))
+        if game.winning_player is not None:
+            outcome[idx] = game.current_marker
+    return outcome
+
+
+def pairing_stats(int_x, int_o, n_games, seed=0, start=0, policy_path=None):
+    """ The same games as game_outcomes, folded into a tictac_stats.GameStats as they finish. """
+    bot_x, bot_o = heuristic_bots(int_x, int_o, policy_path)
+    stats = GameStats()
+    for idx in range(n_games):
+        stats.add_game(_play_game(bot_x, bot_o, game_seed(seed, int_x, int_o, start + idx)))
+    return stats
+
+
+def replay_game(int_x, int_o, game_idx, seed=0, policy_path=None):
+    """ Plays game number game_idx of a pairing again; returns the finished TttBitGame. """
+    bot_x, bot_o = heuristic_bots(int_x, int_o, policy_path)
+    return _play_game(bot_x, bot_o, game_seed(seed, int_x, int_o, game_idx))
+
+
+def _play_unit(unit):
+    """ Plays one chunk of games; returns (int_x, int_o, xwins, owins, draws). """
+    int_x, int_o, chunk, start, n_games, seed, engine, policy_path = unit
+    if engine == "batch":
+        rng = np.random.default_rng(unit_seed(seed, int_x, int_o, chunk))
+        _, outcome = ttbatch.play_batch(np.full(n_games, int_x), np.full(n_games, int_o), rng)
+    else:
+        outcome = game_outcomes(int_x, int_o, n_games, seed, start, policy_path)
+    return int_x, int_o, int((outcome == 1).sum()), int((outcome == -1).sum()), int((outcome == 0).sum())
+
+
+def _stats_unit(unit):
+    int_x, int_o, chunk, start, n_games, seed, engine, policy_path = unit
+    return int_x, int_o, pairing_stats(int_x, int_o, n_games, seed, start, policy_path)
+
+
+def work_units(n_games, intelligence, seed, chunk_size, engine="object", policy_path=None):
+    units = []
+    for int_x in intelligence:
+        for int_o in intelligence:
+            for chunk, start in enumerate(range(0, n_games, chunk_size)):
+                units.append((int_x, int_o, chunk, start, min(chunk_size, n_games - start), seed, engine, policy_path))
+    return units
+
+
+def run_tournament(n_games=1000, intelligence=range(4), seed=0, workers=None,
+                   chunk_size=DEFAULT_CHUNK, engine="object", policy_path=None):
+    """ Plays n_games for every (INTELLIGENCE_x, INTELLIGENCE_o) pairing.
+
+    engine is "object" (TttHeuristic bots on TttBitGame, optionally reading the policy table at
+    policy_path) or "batch" (tictac_batch arrays).  workers=1 runs in-process; None uses every core.
+    Returns the xwins, owins, draws matrices, indexed by position in `intelligence`.
+    """
+    intelligence = list(intelligence)
+    position = {level: idx for idx, level in enumerate(intelligence)}
+    n_int = len(intelligence)
+    xwins = np.zeros((n_int, n_int))
+    owins = np.zeros((n_int, n_int))
+    draws = np.zeros((n_int, n_int))
+
+    units = work_units(n_games, intelligence, seed, chunk_size, engine, policy_path)
+    if workers == 1:
+        _reduce(map(_play_unit, units), position, xwins, owins, draws)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            _reduce(pool.map(_play_unit, units), position, xwins, owins, draws)
+    return xwins, owins, draws
+
+
+def run_stats(n_games=1000, intelligence=range(4), seed=0, workers=None, chunk_size=DEFAULT_CHUNK, policy_path=None):
+    """ The object-engine run_tournament, returning a GameStats per (int_x, int_o) pairing.
+
+    Workers send back aggregates rather than games, so memory stays flat however many are played.
+    """
+    stats = {(int_x, int_o): GameStats() for int_x in intelligence for int_o in intelligence}
+    units = work_units(n_games, intelligence, seed, chunk_size, "object", policy_path)
+    if workers == 1:
+        _merge_stats(map(_stats_unit, units), stats)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            _merge_stats(pool.map(_stats_unit, units), stats)
+    return stats
+
+
+def _merge_stats(results, stats):
+    for int_x, int_o, unit_stats in results:
+        stats[int_x, int_o].merge(unit_stats)
+
+
+def _reduce(results, position, xwins, owins, draws):
+    for int_x, int_o, xtmp, otmp, dtmp in results:
+        xwins[position[int_x], position[int_o]] += xtmp
+        owins[position[int_x], position[int_o]] += otmp
+        draws[position[int_x], position[int_o]] += dtmp
+
+
+def wilson_interval(successes, n_games, z=1.96):
+    """ Wilson score interval (low, high) for a success rate. """
+    if n_games == 0:
+        return 0., 1.
+    rate = successes / n_games
+    centre = (rate + z * z / (2 * n_games)) / (1 + z * z / n_games)
+    half = z * math.sqrt(rate * (1 - rate) / n_games + z * z / (4 * n_games * n_games)) / (1 + z * z / n_games)
+    return centre - half, centre + half
+
+
+def _widest_interval(counts, n_games, z):
+    return max(high - low for low, high in (wilson_interval(successes, n_games, z) for successes in counts))
+
+
+def run_adaptive(ci_width=0.1, confidence=0.95, max_games=10000, intelligence=range(4), seed=0, workers=None,
+                 chunk_size=DEFAULT_CHUNK, engine="object", policy_path=None):
+    """ Like run_tournament, but each pairing stops once the Wilson intervals of its xwin, owin and
+    draw rates are all narrower than ci_width (or after max_games).  The default, +/-5 points at
+    95%, needs about 400 games for an even pairing and a chunk for a lopsided one.
+
+    Pairings play one chunk per round, with the same units and seeds as run_tournament, so the
+    result is still independent of the worker count.  Returns xwins, owins, draws and the games
+    actually played per pairing.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    intelligence = list(intelligence)
+    position = {level: idx for idx, level in enumerate(intelligence)}
+    n_int = len(intelligence)
+    xwins = np.zeros((n_int, n_int))
+    owins = np.zeros((n_int, n_int))
+    draws = np.zeros((n_int, n_int))
+    games = np.zeros((n_int, n_int), dtype=int)
+
+    pool = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = [(int_x, int_o) for int_x in intelligence for int_o in intelligence]
+        chunk = 0
+        while pending:
+            n_chunk = min(chunk_size, max_games - chunk * chunk_size)
+            units = [(int_x, int_o, chunk, chunk * chunk_size, n_chunk, seed, engine, policy_path) for int_x, int_o in pending]
+            _reduce(map(_play_unit, units) if pool is None else pool.map(_play_unit, units), position, xwins, owins, draws)
+            chunk += 1
+
+            still_pending = []
+            for int_x, int_o in pending:
+                cell = position[int_x], position[int_o]
+                games[cell] += n_chunk
+                counts = (xwins[cell], owins[cell], draws[cell])
+                if games[cell] < max_games and _widest_interval(counts, games[cell], z) > ci_width:
+                    still_pending.append((int_x, int_o))
+            pending = still_pending
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return xwins, owins, draws, games
@@ -251,46 +251,8 @@ class TttHeuristic(TttPlayer):
         return random.choice(game.legal_moves)
 
 
-if False:
-    p1 = TttHuman("hum1")
-    p2 = TttHuman("hum2")
-    game = TttGame(p1, p2)
-
-    # make dummy board to test
-    game.board[0,1] = 1
-    game.board[1, 0] = 1
-    game.board[1,1] = -1
-    game.board[2,2] = -1
-
-    b1 = TttHeuristic("bot");
-    wr, wc = b1._check_for_possible_wins(game, 1)
-    print(wr, wc)
-    print(game.board)
-elif False:
-    p1 = TttHuman("Dan")
-    b1 = TttHeuristic("bot")
-#    game = TttGame(p1, b1)
-#    game.play()
-elif True:
-    # autobots
-    b1 = TttHeuristic("bot1")
-    b2 = TttHeuristic("bot2")
-    autogames = []
-
-    for idx in range(1000):
-        game = TttGame(b1,b2)
-        game.play()
-        autogames.append(game)
-
-    identical = 0
-    tot = 0
-    for idx in range(len(autogames)):
-        if idx % 100 == 0:
-            print(idx)
-        ref = autogames[idx] 
-        checks = autogames[:idx] + autogames[idx+1:] 
-        for check in checks:
-            tot += 1
-            if (check.board == ref.board).all(): 
-                identical += 1
-                print("{0} out of {1} boards are identical".format(identical, idx+1))
+if __name__ == "__main__":
+    # the modes that used to be switched on here are subcommands of tictac_cli now
+    import sys
+    from tictac_cli import main
+    sys.exit(main())